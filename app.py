@@ -1,11 +1,16 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context, send_from_directory
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import time
 from datetime import datetime
 import json
 import re
+import click
+import hashlib
+import math
+import uuid
 
 app = Flask(__name__)
 print("DEBUG: app type is", type(app))
@@ -19,15 +24,39 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///kitchenbuddy.db'
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Optional read replica for read-only pages (a second Postgres, or a SQLite copy locally)
+app.config['SQLALCHEMY_REPLICA_URI'] = os.environ.get('DATABASE_REPLICA_URL')
 
-db = SQLAlchemy(app)
+# Engine options, pools and replica routing for the configured database (WAL, busy timeout, ... for SQLite)
+import db_profile
+from db_profile import read_only
+from page_cache import page_cache, cached_page, set_last_modified
+from assets import assets
+from compression import compressor
+from event_hub import event_hub
+db_profile.configure(app)
+
+db = SQLAlchemy(app, session_options={'class_': db_profile.RoutingSession})
+db_profile.install(app, db)
+
+def upgrade_database():
+    """Create missing tables, and the columns and indexes declared since an existing database was made"""
+    db.create_all()
+    add_missing_columns()
+    # An older database may hold several active sessions per user, which the unique index forbids
+    session_manager.close_duplicates()
+    create_missing_indexes()
 
 @app.before_first_request
 def create_tables():
-    db.create_all()
+    upgrade_database()
+    sync_recipe_tags()
+    autocomplete_index.ensure_loaded()
 
 # THEN define routes here
 @app.route('/')
+@cached_page
+@read_only
 def index():
     """Home page with featured recipes"""
     featured_recipes = Recipe.query.limit(6).all()
@@ -39,10 +68,67 @@ login_manager.login_view = 'login'
 
 # Import models after db initialization
 from models.db_models import User, Recipe, Step, VoiceCommand, CookingSession
+from models.schema import add_missing_columns, create_missing_indexes
+from models.dietary_tags import set_recipe_tags, parse_tags, sync_recipe_tags
+from models.facets import facet_index, COOKING_TIME_BUCKETS
+from models.autocomplete import autocomplete_index
+from models.step_diff import apply_step_diff
+from models.durations import estimate_minutes, step_minutes, backfill_step_times
+from models.step_cache import step_cache, recipe_version
+from models.user_cache import user_cache
+from fragment_cache import fragment_cache
+from models.loader import (load_recipes, iter_load_recipes, read_recipe_file, iter_ndjson, export_recipes,
+                           synthetic_recipes, SAMPLE_RECIPES_PATH, DEFAULT_CHUNK_SIZE)
+
+SEARCH_PAGE_SIZE = 24
+
+def recipe_written(recipe):
+    """Bring in-memory recipe indexes up to date after a committed recipe write"""
+    facet_index.update_recipe(recipe)
+    autocomplete_index.update_recipe(recipe)
+    step_cache.invalidate(recipe.id)
+    cooking_state.invalidate_recipe(recipe.id)
+    page_cache.recipe_changed(recipe.id)
+
+def recipe_removed(recipe_id):
+    """Drop a deleted recipe from in-memory recipe indexes"""
+    facet_index.remove_recipe(recipe_id)
+    autocomplete_index.remove_recipe(recipe_id)
+    step_cache.invalidate(recipe_id)
+    cooking_state.invalidate_recipe(recipe_id)
+    page_cache.recipe_changed(recipe_id)
+
+def recipes_reloaded():
+    """Rebuild in-memory recipe indexes after a bulk change to the catalog"""
+    facet_index.invalidate()
+    autocomplete_index.invalidate()
+    step_cache.clear()
+    cooking_state.clear()
+    page_cache.clear()
+    fragment_cache.clear()
+
+from voice_assistant.command_logger import command_logger
+from voice_assistant.command_retention import command_retention
+from voice_assistant.session_manager import session_manager
+from voice_assistant.cooking_state import cooking_state
+command_logger.init_app(app)
+command_retention.init_app(app)
+session_manager.init_app(app)
+cooking_state.init_app(app)
+step_cache.init_app(app)
+user_cache.init_app(app)
+page_cache.init_app(app)
+fragment_cache.init_app(app)
+assets.init_app(app)
+compressor.init_app(app)
+event_hub.init_app(app)
+# Keep the intent rollups current as each batch of commands is written
+command_logger.add_listener(lambda records: command_retention.rollup())
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # A read-only copy, cached briefly; load the User itself to change it
+    return user_cache.get(int(user_id))
 
 # Initialize voice assistant components
 try:
@@ -50,7 +136,6 @@ try:
     from voice_assistant.intent_detector import IntentDetector
     from voice_assistant.text_to_speech import TextToSpeech
     from voice_assistant.ai_response import AIResponseGenerator
-    from voice_assistant.timer_manager import timer_manager
     
     speech_to_text = SpeechToText()
     intent_detector = IntentDetector()
@@ -62,8 +147,41 @@ except ImportError as e:
     intent_detector = None
     text_to_speech = None
     ai_generator = None
+
+# Timers only need text to speech, so they still work without speech recognition
+MAX_TIMER_MINUTES = 24 * 60
+try:
+    from voice_assistant.timer_manager import timer_manager, MAX_TIMERS_PER_USER
+except ImportError as e:
+    print(f"Timers not available: {e}")
     timer_manager = None
 
+def cooking_event(state):
+    """Payload of 'session' and 'step' events for a cooking state (None when not cooking)"""
+    if not state:
+        return {'active': False}
+    return {
+        'active': True,
+        'recipe_id': state['recipe_id'],
+        'recipe_title': state['recipe_title'],
+        'current_step': state['current_step'],
+        'total_steps': state['total_steps']
+    }
+
+def publish_session(user_id):
+    """Tell the user's other devices their cooking session started or ended"""
+    if event_hub.has_subscribers(user_id):
+        event_hub.publish(user_id, 'session', cooking_event(cooking_state.get(user_id)))
+
+def publish_timer_event(event, timer):
+    if timer['user_id'] is not None:
+        event_hub.publish(timer['user_id'], f'timer.{event}', timer)
+
+# Push step changes and timer events to the user's open event streams
+cooking_state.add_listener(lambda user_id, state: event_hub.publish(user_id, 'step', cooking_event(state)))
+if timer_manager:
+    timer_manager.add_listener(publish_timer_event)
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -112,10 +230,14 @@ def signup():
 def logout():
     logout_user()
     flash('You have been logged out', 'info')
-    return redirect(url_for('index'))
+    response = redirect(url_for('index'))
+    # Also drops voice-only mode's offline copy of this user's recipe where the browser supports it
+    response.headers['Clear-Site-Data'] = '"storage"'
+    return response
 
 @app.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
     """User dashboard with saved recipes and cooking history"""
     user_recipes = Recipe.query.filter_by(user_id=current_user.id).all()
@@ -123,10 +245,13 @@ def dashboard():
     return render_template('dashboard.html', user_recipes=user_recipes, all_recipes=all_recipes)
 
 @app.route('/recipe/<int:recipe_id>')
+@cached_page
+@read_only
 def recipe(recipe_id):
     """Display individual recipe with cooking steps"""
     recipe = Recipe.query.get_or_404(recipe_id)
-    steps = Step.query.filter_by(recipe_id=recipe_id).order_by(Step.step_number).all()
+    set_last_modified(recipe.updated_at)
+    steps = step_cache.for_recipe(recipe)
     return render_template('recipe.html', recipe=recipe, steps=steps)
 
 @app.route('/admin_panel')
@@ -138,7 +263,38 @@ def admin_panel():
         return redirect(url_for('dashboard'))
     
     recipes = Recipe.query.all()
-    return render_template('admin_panel.html', recipes=recipes)
+    voice_summary = command_retention.summary(days=30, top=0)
+    return render_template('admin_panel.html', recipes=recipes, voice_summary=voice_summary)
+
+@app.route('/admin/analytics')
+@login_required
+def admin_analytics():
+    """Voice intent analytics from the rollup tables (admin only)"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('dashboard'))
+    
+    days = min(max(request.args.get('days', 7, type=int), 1), 365)
+    summary = command_retention.summary(days=days)
+    top_recipes = autocomplete_index.top_recipes(10)
+    return render_template('admin_analytics.html', summary=summary, top_recipes=top_recipes, days=days)
+
+@app.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    """Connection pool, cache, compression and event stream metrics as JSON (admin only)"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('dashboard'))
+    
+    return jsonify({
+        'db_pools': db_profile.pool_stats(db),
+        'step_cache': step_cache.stats(),
+        'page_cache': page_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'compression': compressor.stats(),
+        'event_streams': event_hub.stats()
+    })
 
 @app.route('/admin/add_recipe', methods=['GET', 'POST'])
 @login_required
@@ -160,23 +316,29 @@ def add_recipe():
             title=title,
             category=category,
             ingredients=ingredients,
-            dietary_tags=dietary_tags,
             user_id=current_user.id
         )
+        set_recipe_tags(recipe, dietary_tags)
         db.session.add(recipe)
         db.session.flush()  # Get the recipe ID
         
-        # Add steps
+        # Add steps, timing each one from the durations in its text
+        step_times = []
         for i, step_text in enumerate(steps_data, 1):
             if step_text.strip():
                 step = Step(
                     recipe_id=recipe.id,
                     step_number=i,
-                    instruction=step_text.strip()
+                    instruction=step_text.strip(),
+                    estimated_time=estimate_minutes(step_text)
                 )
                 db.session.add(step)
+                if step.estimated_time is not None:
+                    step_times.append(step.estimated_time)
+        recipe.cooking_time = sum(step_times) if step_times else None
         
         db.session.commit()
+        recipe_written(recipe)
         flash('Recipe added successfully!', 'success')
         return redirect(url_for('admin_panel'))
     
@@ -191,33 +353,31 @@ def edit_recipe(recipe_id):
         return redirect(url_for('dashboard'))
     
     recipe = Recipe.query.get_or_404(recipe_id)
-    steps = Step.query.filter_by(recipe_id=recipe_id).order_by(Step.step_number).all()
     
     if request.method == 'POST':
         recipe.title = request.form['title']
         recipe.category = request.form['category']
         recipe.ingredients = request.form['ingredients']
-        recipe.dietary_tags = request.form['dietary_tags']
+        set_recipe_tags(recipe, request.form['dietary_tags'])
         
-        # Delete existing steps
-        Step.query.filter_by(recipe_id=recipe_id).delete()
+        # A cooking time that was the total of the steps follows them; one set by hand is kept
+        derived_time = recipe.cooking_time is None or recipe.cooking_time == step_minutes(recipe.id)
         
-        # Add new steps
-        steps_data = request.form.getlist('steps[]')
-        for i, step_text in enumerate(steps_data, 1):
-            if step_text.strip():
-                step = Step(
-                    recipe_id=recipe_id,
-                    step_number=i,
-                    instruction=step_text.strip()
-                )
-                db.session.add(step)
+        # Update steps in place, keeping unchanged ones and their derived data
+        for step in apply_step_diff(recipe, request.form.getlist('steps[]')):
+            step.estimated_time = estimate_minutes(step.instruction)
+        if derived_time:
+            recipe.cooking_time = step_minutes(recipe.id)
+        # Steps live in their own table, so bump the recipe's version explicitly
+        recipe.updated_at = datetime.utcnow()
         
         db.session.commit()
+        session_manager.refresh_total_steps(recipe.id, len(step_cache.for_recipe(recipe)))
+        recipe_written(recipe)
         flash('Recipe updated successfully!', 'success')
         return redirect(url_for('admin_panel'))
     
-    return render_template('edit_recipe.html', recipe=recipe, steps=steps)
+    return render_template('edit_recipe.html', recipe=recipe, steps=step_cache.for_recipe(recipe))
 
 @app.route('/admin/delete_recipe/<int:recipe_id>')
 @login_required
@@ -231,31 +391,230 @@ def delete_recipe(recipe_id):
     Step.query.filter_by(recipe_id=recipe_id).delete()
     db.session.delete(recipe)
     db.session.commit()
+    recipe_removed(recipe_id)
     flash('Recipe deleted successfully!', 'success')
     return redirect(url_for('admin_panel'))
 
+@app.route('/admin/export_recipes')
+@login_required
+def export_recipes_route():
+    """Stream every recipe with its steps as NDJSON (admin only)"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('dashboard'))
+    
+    def generate():
+        for record in export_recipes():
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+    
+    filename = f"recipes-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/admin/import_recipes', methods=['POST'])
+@login_required
+def import_recipes_route():
+    """Import NDJSON recipes (request body or 'file' upload), streaming progress back as NDJSON (admin only)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    chunk_size = min(max(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 1), 5000)
+    owner_id = current_user.id
+    
+    def generate():
+        totals = {'inserted': 0, 'updated': 0, 'steps': 0}
+        try:
+            for totals in iter_load_recipes(iter_ndjson(stream), owner_id, chunk_size):
+                yield json.dumps({'progress': totals}) + '\n'
+        except Exception as e:
+            # Chunks committed before the failure are kept
+            yield json.dumps({'error': str(e), 'committed': totals}) + '\n'
+            return
+        finally:
+            recipes_reloaded()
+        yield json.dumps({'done': True, 'totals': totals}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/search')
+@cached_page
+@read_only
 def search():
-    """Search recipes by title or category"""
-    query = request.args.get('q', '')
-    category = request.args.get('category', '')
+    """Search recipes by title with category, dietary, difficulty and cooking time facets"""
+    query = request.args.get('q', '').strip()
+    selected = get_facet_filters(request.args)
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    recipe_ids, facets = facet_index.search(query, selected)
+    total = len(recipe_ids)
+    pages = max((total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE, 1)
+    page_ids = recipe_ids[(page - 1) * SEARCH_PAGE_SIZE:page * SEARCH_PAGE_SIZE]
+    recipes = Recipe.query.filter(Recipe.id.in_(page_ids)).order_by(Recipe.id).all() if page_ids else []
+    
+    def page_url(number):
+        args = request.args.to_dict(flat=False)
+        args['page'] = number
+        return url_for('search', **args)
+    
+    return render_template('search_results.html', recipes=recipes, query=query, selected=selected,
+                           facet_groups=build_facet_groups(facets, selected), total=total,
+                           page=page, pages=pages, page_url=page_url)
+
+@app.route('/api/search')
+@read_only
+def api_search():
+    """Search results plus facet counts as JSON, in one round trip"""
+    query = request.args.get('q', '').strip()
+    selected = get_facet_filters(request.args)
+    limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    recipe_ids, facets = facet_index.search(query, selected)
+    page_ids = recipe_ids[offset:offset + limit]
+    recipes = Recipe.query.filter(Recipe.id.in_(page_ids)).order_by(Recipe.id).all() if page_ids else []
+    
+    return jsonify({
+        'total': len(recipe_ids),
+        'results': [{
+            'id': r.id,
+            'title': r.title,
+            'category': r.category,
+            'dietary_tags': r.tag_names,
+            'difficulty_level': r.difficulty_level,
+            'cooking_time': r.cooking_time,
+            'url': url_for('recipe', recipe_id=r.id)
+        } for r in recipes],
+        'facets': facets
+    })
+
+@app.route('/api/autocomplete')
+def autocomplete():
+    """Prefix suggestions for recipe titles and ingredients, most popular first"""
+    prefix = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    suggestions = autocomplete_index.suggest(prefix, limit)
+    return jsonify({'query': prefix, 'suggestions': suggestions})
+
+@app.route('/api/recipes/<int:recipe_id>/bundle')
+@read_only
+def recipe_bundle(recipe_id):
+    """Title, ingredients and every step of a recipe in one payload, so voice clients can navigate locally"""
+    updated_at = db.session.query(Recipe.updated_at).filter_by(id=recipe_id).first()
+    if updated_at is None:
+        return jsonify({'error': 'Recipe not found'}), 404
+    version = recipe_version(updated_at[0])
+    etag = hashlib.sha1(f'{recipe_id}:{version}:{text_to_speech is not None}'.encode()).hexdigest()
+    
+    if not request.if_none_match.contains_weak(etag):
+        recipe = db.session.get(Recipe, recipe_id)
+        steps = step_cache.get(recipe_id, version)
+        response = jsonify({
+            'id': recipe.id,
+            'title': recipe.title,
+            'version': version,
+            'ingredients': recipe.ingredients,
+            'cooking_time': recipe.cooking_time,
+            'total_steps': len(steps),
+            'steps': [{
+                'step_number': step.step_number,
+                'instruction': step.instruction,
+                'voice_text': step.voice_instruction or step.instruction,
+                'estimated_time': step.estimated_time,
+                'suggested_timers': step.suggested_timers,
+                'audio_url': url_for('step_audio', recipe_id=recipe_id, step_number=step.step_number,
+                                     v=version) if text_to_speech else None
+            } for step in steps],
+            'progress_url': url_for('cooking_progress')
+        })
+    else:
+        response = Response(status=304)
     
-    recipes = Recipe.query
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True  # revalidate; an unchanged recipe costs a 304
+    return response.make_conditional(request)
+
+@app.route('/api/recipes/<int:recipe_id>/steps/<int:step_number>/audio')
+def step_audio(recipe_id, step_number):
+    """Spoken audio of a step, rendered once per distinct step text and kept on disk"""
+    if not text_to_speech:
+        return jsonify({'error': 'Text to speech is not available'}), 503
+    
+    updated_at = db.session.query(Recipe.updated_at).filter_by(id=recipe_id).scalar()
+    version = recipe_version(updated_at)
+    step = next((s for s in step_cache.get(recipe_id, version) if s.step_number == step_number), None)
+    if step is None:
+        return jsonify({'error': 'Step not found'}), 404
+    
+    text = step.voice_instruction or step.instruction
+    filename = f"step_{hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]}.mp3"
+    if not os.path.exists(os.path.join(text_to_speech.audio_dir, filename)):
+        if not text_to_speech.convert_text_to_speech(text, filename=filename):
+            return jsonify({'error': 'Could not render audio'}), 503
+    
+    response = send_from_directory(os.path.abspath(text_to_speech.audio_dir), filename, mimetype='audio/mpeg')
+    if request.args.get('v') == version:
+        # Versioned URLs from the bundle never change meaning
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+@app.route('/api/cooking/progress', methods=['POST'])
+@login_required
+def cooking_progress():
+    """Record the step a voice client navigated to locally; written to the session in the background"""
+    data = request.get_json(silent=True) or {}
+    state = cooking_state.get(current_user.id)
+    if not state or state['recipe_id'] != data.get('recipe_id'):
+        return jsonify({'success': False, 'message': 'No active cooking session for this recipe.'}), 409
+    
+    step_number = data.get('step')
+    if not isinstance(step_number, int) or not 1 <= step_number <= state['total_steps']:
+        return jsonify({'success': False, 'message': 'Step out of range.'}), 400
+    
+    cooking_state.set_step(current_user.id, step_number)
+    return jsonify({'success': True, 'current_step': step_number})
+
+def get_facet_filters(args):
+    """Read facet selections from request args; values may be repeated or comma-separated"""
+    def values(name):
+        return [v.strip() for raw in args.getlist(name) for v in raw.split(',') if v.strip()]
+    
+    return {
+        'category': values('category'),
+        'dietary': parse_tags(args.getlist('dietary')),
+        'difficulty': [v.lower() for v in values('difficulty')],
+        'cooking_time': values('cooking_time')
+    }
+
+def build_facet_groups(facets, selected):
+    """Arrange facet counts as (facet, label, [(value, value label, count)]) for the template"""
+    time_labels = {key: label for key, label, _low, _high in COOKING_TIME_BUCKETS}
     
-    if query:
-        recipes = recipes.filter(Recipe.title.contains(query))
-    if category:
-        recipes = recipes.filter(Recipe.category == category)
+    def entries(facet, order=None, labels=None):
+        counts = dict(facets.get(facet, {}))
+        for value in selected[facet]:
+            counts.setdefault(value, 0)  # keep selected values visible even at zero
+        order = order or []
+        keys = [k for k in order if k in counts] + sorted(k for k in counts if k not in order)
+        return [(k, (labels or {}).get(k, k), counts[k]) for k in keys]
     
-    recipes = recipes.all()
-    return render_template('search_results.html', recipes=recipes, query=query, category=category)
+    return [
+        ('category', 'Category', entries('category')),
+        ('dietary', 'Dietary', entries('dietary')),
+        ('difficulty', 'Difficulty', entries('difficulty', order=['easy', 'medium', 'hard'])),
+        ('cooking_time', 'Cooking Time', entries('cooking_time', order=list(time_labels), labels=time_labels))
+    ]
 
 @app.route('/recipe/<int:recipe_id>/step/<int:step_number>')
 @login_required
 def recipe_step(recipe_id, step_number):
     """Display a specific step of a recipe"""
     recipe = Recipe.query.get_or_404(recipe_id)
-    steps = Step.query.filter_by(recipe_id=recipe_id).order_by(Step.step_number).all()
+    steps = step_cache.for_recipe(recipe)
     
     if not steps or step_number < 1 or step_number > len(steps):
         flash('Invalid step number', 'error')
@@ -268,24 +627,36 @@ def recipe_step(recipe_id, step_number):
     timer_minutes = session.get('timer_minutes')
     timer_start_time = session.get('timer_start_time')
 
-    # Update session with current cooking state
-    session['current_recipe_id'] = recipe_id
-    session['current_step'] = step_number
+    # Keep the active cooking session on the step being viewed
+    state = cooking_state.get(current_user.id)
+    if state and state['recipe_id'] == recipe_id and state['current_step'] != step_number:
+        cooking_state.set_step(current_user.id, step_number)
     
     return render_template('recipe_step.html', 
                          recipe=recipe, 
                          current_step=current_step,
+                         steps=steps,
                          step_number=step_number,
                          total_steps=total_steps,
                          timer_minutes=timer_minutes,
                          timer_start_time=timer_start_time)
 
+def get_current_step(recipe_id):
+    """Step the user is on: from the page's ?step=, else their active cooking session"""
+    step_number = request.args.get('step', type=int)
+    if step_number:
+        return step_number
+    state = cooking_state.get(current_user.id)
+    if state and state['recipe_id'] == recipe_id:
+        return state['current_step']
+    return 1
+
 @app.route('/recipe/<int:recipe_id>/next_step')
 @login_required
 def next_step(recipe_id):
     """Navigate to next step"""
-    current_step = session.get('current_step', 1)
-    steps = Step.query.filter_by(recipe_id=recipe_id).order_by(Step.step_number).all()
+    current_step = get_current_step(recipe_id)
+    steps = step_cache.for_recipe_id(recipe_id)
     
     if current_step < len(steps):
         return redirect(url_for('recipe_step', recipe_id=recipe_id, step_number=current_step + 1))
@@ -297,7 +668,7 @@ def next_step(recipe_id):
 @login_required
 def prev_step(recipe_id):
     """Navigate to previous step"""
-    current_step = session.get('current_step', 1)
+    current_step = get_current_step(recipe_id)
     
     if current_step > 1:
         return redirect(url_for('recipe_step', recipe_id=recipe_id, step_number=current_step - 1))
@@ -308,10 +679,21 @@ def prev_step(recipe_id):
 @login_required
 def start_timer(recipe_id, step_number, minutes):
     """Start a timer for a specific step"""
+    step_url = url_for('recipe_step', recipe_id=recipe_id, step_number=step_number)
+    if not 0 < minutes <= MAX_TIMER_MINUTES:
+        flash(f'Timers can run for 1 to {MAX_TIMER_MINUTES} minutes', 'error')
+        return redirect(step_url)
+    if timer_manager:
+        # A server timer too, so the user's other devices see it on their event stream
+        timer_id = f'recipe-{recipe_id}-step-{step_number}'
+        timer_manager.stop_timer(timer_id, user_id=current_user.id)
+        if not timer_manager.start_timer(timer_id, minutes, user_id=current_user.id, label=f'Step {step_number}'):
+            flash(f'You already have {MAX_TIMERS_PER_USER} timers running; stop one to start another', 'error')
+            return redirect(step_url)
     session['timer_minutes'] = minutes
     session['timer_start_time'] = datetime.utcnow().isoformat()
     flash(f'Timer started for {minutes} minutes', 'info')
-    return redirect(url_for('recipe_step', recipe_id=recipe_id, step_number=step_number))
+    return redirect(step_url)
 
 @app.route('/transcribe', methods=['POST'])
 @login_required
@@ -334,26 +716,22 @@ def transcribe_audio():
         # Detect intent
         intent = intent_detector.detect_intent(text)
         
-        # Log voice command
-        voice_command = VoiceCommand(
-            user_id=current_user.id,
-            command_text=text,
-            intent_detected=intent
-        )
-        db.session.add(voice_command)
-        db.session.commit()
-        
-        # Get current recipe context from session
-        current_recipe_id = session.get('current_recipe_id')
-        current_step = session.get('current_step', 1)
+        # Get current recipe context from the cooking state
+        state = cooking_state.get(current_user.id)
+        current_recipe_id = state['recipe_id'] if state else None
+        current_step = state['current_step'] if state else 1
         
         # Handle different intents
         response_data = handle_voice_intent(intent, text, current_recipe_id, current_step)
         
-        # Update voice command with response
-        voice_command.response_generated = response_data.get('message', '')
-        voice_command.success = response_data.get('success', False)
-        db.session.commit()
+        # Log voice command with its response; written in batches off the request path
+        command_logger.log(
+            user_id=current_user.id,
+            command_text=text,
+            intent_detected=intent,
+            response_generated=response_data.get('message', ''),
+            success=response_data.get('success', False)
+        )
         
         return jsonify(response_data)
     
@@ -367,16 +745,20 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
         # Extract recipe name and find it
         recipe_name = intent_detector.extract_recipe_name(text)
         if recipe_name:
-            recipe = intent_detector.find_recipe_by_name(recipe_name)
+            # Try the titles matching the spoken prefix first, then the whole catalog
+            candidate_ids = autocomplete_index.recipe_ids(recipe_name)
+            recipe = None
+            if candidate_ids:
+                recipe = intent_detector.find_recipe_by_name(
+                    recipe_name, Recipe.query.filter(Recipe.id.in_(candidate_ids)).all())
+            if not recipe:
+                recipe = intent_detector.find_recipe_by_name(recipe_name)
             if recipe:
-                # Create cooking session
-                cooking_session = CookingSession(
-                    user_id=current_user.id,
-                    recipe_id=recipe.id,
-                    current_step=1
-                )
-                db.session.add(cooking_session)
-                db.session.commit()
+                # Create cooking session, closing any earlier one
+                session_manager.start(current_user.id, recipe.id, len(step_cache.for_recipe(recipe)))
+                cooking_state.invalidate(current_user.id)
+                publish_session(current_user.id)
+                autocomplete_index.record_session(recipe.id)
                 
                 # Speak confirmation
                 if text_to_speech:
@@ -441,8 +823,8 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
         }
     
     elif intent == 'current_step' and current_recipe_id:
-        recipe = Recipe.query.get(current_recipe_id)
-        current_step_obj = Step.query.filter_by(recipe_id=current_recipe_id, step_number=current_step).first()
+        steps = step_cache.for_recipe_id(current_recipe_id)
+        current_step_obj = steps[current_step - 1] if 1 <= current_step <= len(steps) else None
         if current_step_obj and text_to_speech:
             text_to_speech.speak_text(f"You're on step {current_step}: {current_step_obj.instruction}")
         return {
@@ -453,8 +835,12 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
         }
     
     elif intent == 'set_timer':
-        minutes = intent_detector.extract_timer_duration(text)
         if current_recipe_id:
+            # "Set a timer" with no duration takes the one the current step mentions
+            steps = step_cache.for_recipe_id(current_recipe_id)
+            suggested = steps[current_step - 1].suggested_timers if 0 < current_step <= len(steps) else ()
+            default = math.ceil(suggested[0]['minutes']) if suggested else 5
+            minutes = intent_detector.extract_timer_duration(text, default=default)
             if text_to_speech:
                 text_to_speech.speak_text(f"Setting timer for {minutes} minutes.")
             return {
@@ -498,16 +884,16 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
             }
     
     elif intent == 'dietary_filter':
-        preference = intent_detector.extract_dietary_preference(text)
-        if preference:
-            message = f"Showing {preference} recipes for you."
+        preferences = intent_detector.extract_dietary_preferences(text)
+        if preferences:
+            message = f"Showing {' and '.join(preferences)} recipes for you."
             if text_to_speech:
                 text_to_speech.speak_text(message)
             return {
                 'success': True,
                 'text': text,
                 'intent': intent,
-                'redirect_url': url_for('search', dietary=preference),
+                'redirect_url': url_for('search', dietary=preferences),
                 'message': message
             }
         else:
@@ -548,21 +934,17 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
             }
     
     elif intent == 'resume_cooking':
-        active_session = CookingSession.query.filter_by(
-            user_id=current_user.id,
-            is_active=True
-        ).first()
+        state = cooking_state.get(current_user.id)
         
-        if active_session:
-            recipe = Recipe.query.get(active_session.recipe_id)
+        if state:
             if text_to_speech:
-                text_to_speech.speak_text(f"Resuming {recipe.title} from step {active_session.current_step}.")
+                text_to_speech.speak_text(f"Resuming {state['recipe_title']} from step {state['current_step']}.")
             return {
                 'success': True,
                 'text': text,
                 'intent': intent,
-                'redirect_url': url_for('recipe_step', recipe_id=active_session.recipe_id, step_number=active_session.current_step),
-                'message': f"Resuming {recipe.title}"
+                'redirect_url': url_for('recipe_step', recipe_id=state['recipe_id'], step_number=state['current_step']),
+                'message': f"Resuming {state['recipe_title']}"
             }
         else:
             message = "You don't have any active cooking sessions to resume."
@@ -577,18 +959,12 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
     
     elif intent == 'stop_cooking':
         # End active cooking session
-        active_session = CookingSession.query.filter_by(
-            user_id=current_user.id,
-            is_active=True
-        ).first()
-        
-        if active_session:
-            active_session.is_active = False
-            active_session.completed_at = datetime.utcnow()
-            db.session.commit()
+        state = cooking_state.get(current_user.id)
         
-        session.pop('current_recipe_id', None)
-        session.pop('current_step', None)
+        if state:
+            session_manager.end(state['session_id'])
+            cooking_state.invalidate(current_user.id)
+            publish_session(current_user.id)
         
         if text_to_speech:
             text_to_speech.speak_text("Cooking session ended. You can start a new recipe anytime.")
@@ -691,7 +1067,7 @@ def handle_voice_intent(intent, text, current_recipe_id, current_step):
 def stop_timer(timer_id):
     """Stop a specific timer"""
     if timer_manager:
-        success = timer_manager.stop_timer(timer_id)
+        success = timer_manager.stop_timer(timer_id, user_id=current_user.id)
         if success:
             flash('Timer stopped', 'info')
         else:
@@ -704,27 +1080,131 @@ def stop_timer(timer_id):
 def timer_status(timer_id):
     """Get status of a timer"""
     if timer_manager:
-        status = timer_manager.get_timer_status(timer_id)
+        status = timer_manager.get_timer_status(timer_id, user_id=current_user.id)
         if status:
             return jsonify({
                 'active': status['is_active'],
-                'remaining': timer_manager.get_remaining_time(timer_id),
+                'remaining': timer_manager.get_remaining_time(timer_id, user_id=current_user.id),
                 'duration': status['duration_minutes']
             })
     
     return jsonify({'active': False})
 
+@app.route('/api/events')
+@login_required
+def event_stream():
+    """Server-Sent Events for the signed-in user: timer start, tick, expiry and cancel, and cooking step changes"""
+    user_id = current_user.id
+    snapshot = [
+        ('session', cooking_event(cooking_state.get(user_id))),
+        ('timers', {'timers': timer_manager.timers_for_user(user_id) if timer_manager else []})
+    ]
+    
+    def tick():
+        # Sent when the stream is otherwise idle, so clients correct their local countdowns
+        return [('timer.tick', timer) for timer in timer_manager.timers_for_user(user_id)] if timer_manager else []
+    
+    response = Response(event_hub.stream(user_id, snapshot, tick), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a proxy hold events back
+    return response
+
+@app.route('/api/timers', methods=['GET', 'POST'])
+@login_required
+def api_timers():
+    """
+    List the user's timers, or create, extend and cancel several in one request:
+    {"create": [{"minutes": 10, "label": "pasta"}], "extend": [{"id": "...", "minutes": 2}], "cancel": ["..."]}
+    """
+    if not timer_manager:
+        return jsonify({'error': 'Timers not available'}), 503
+    
+    user_id = current_user.id
+    if request.method == 'GET':
+        return jsonify({'timers': timer_manager.timers_for_user(user_id)})
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    for action in ('create', 'extend', 'cancel'):
+        if not isinstance(data.get(action, []), list):
+            return jsonify({'error': f'{action} must be a list'}), 400
+    results = {'created': [], 'extended': [], 'cancelled': [], 'errors': []}
+    
+    def minutes_of(entry):
+        minutes = entry.get('minutes') if isinstance(entry, dict) else None
+        if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or not 0 < minutes <= MAX_TIMER_MINUTES:
+            results['errors'].append({'timer': entry, 'error': f'minutes must be between 0 and {MAX_TIMER_MINUTES}'})
+            return None
+        return minutes
+    
+    def id_of(entry):
+        timer_id = entry.get('id') if isinstance(entry, dict) else entry
+        if isinstance(timer_id, bool) or not isinstance(timer_id, (str, int)) or timer_id == '':
+            results['errors'].append({'timer': entry, 'error': 'id must be a non-empty string'})
+            return None
+        return str(timer_id)
+    
+    for entry in data.get('cancel', []):
+        timer_id = id_of(entry)
+        if timer_id is None:
+            continue
+        if timer_manager.stop_timer(timer_id, user_id=user_id):
+            results['cancelled'].append(timer_id)
+        else:
+            results['errors'].append({'timer': entry, 'error': 'Timer not found'})
+    
+    for entry in data.get('extend', []):
+        minutes = minutes_of(entry)
+        timer_id = id_of(entry) if minutes is not None else None
+        if timer_id is None:
+            continue
+        if timer_manager.extend_timer(timer_id, minutes, user_id=user_id):
+            results['extended'].append(timer_id)
+        else:
+            results['errors'].append({'timer': entry, 'error': 'Timer not found'})
+    
+    for entry in data.get('create', []):
+        minutes = minutes_of(entry)
+        if minutes is None:
+            continue
+        # The id is optional here; one is made up when it is left out
+        timer_id = id_of(entry) if entry.get('id') is not None else uuid.uuid4().hex[:8]
+        if timer_id is None:
+            continue
+        label = entry.get('label')
+        if label is not None and not isinstance(label, str):
+            results['errors'].append({'timer': entry, 'error': 'label must be a string'})
+            continue
+        if timer_manager.start_timer(timer_id, minutes, user_id=user_id, label=label):
+            results['created'].append(timer_id)
+        else:
+            results['errors'].append({'timer': entry, 'error': f'Timer already exists or the limit of {MAX_TIMERS_PER_USER} is reached'})
+    
+    return jsonify({
+        'success': not results['errors'],
+        **results,
+        'timers': timer_manager.timers_for_user(user_id)
+    })
+
 @app.route('/voice_only')
 @login_required
 def voice_only_mode():
     """Voice-only interface for hands-free cooking"""
-    active_session = CookingSession.query.filter_by(
-        user_id=current_user.id,
-        is_active=True
-    ).first()
+    # Make sure steps changed from the step pages are in the session row
+    cooking_state.flush()
+    active_session = session_manager.active_session(current_user.id)
     
     return render_template('voice_only.html', active_session=active_session)
 
+@app.route('/voice_sw.js')
+def voice_service_worker():
+    """Service worker for voice-only mode; served from the root so it can control /voice_only"""
+    response = send_from_directory(os.path.join(app.static_folder, 'js'), 'voice_sw.js',
+                                   mimetype='application/javascript', max_age=0)
+    response.cache_control.no_cache = True  # browsers must see a new worker as soon as it is deployed
+    return response
+
 @app.route('/api/voice_status')
 @login_required
 def voice_status():
@@ -734,7 +1214,7 @@ def voice_status():
         'tts_enabled': text_to_speech is not None,
         'ai_enabled': ai_generator is not None,
         'timer_enabled': timer_manager is not None,
-        'active_timers': timer_manager.get_timer_count() if timer_manager else 0
+        'active_timers': timer_manager.get_timer_count(current_user.id) if timer_manager else 0
     })
 
 @app.route('/ai_query', methods=['POST'])
@@ -753,15 +1233,12 @@ def ai_query():
             })
         
         # Get current cooking session for context
-        active_session = CookingSession.query.filter_by(
-            user_id=current_user.id,
-            is_active=True
-        ).first()
+        state = cooking_state.get(current_user.id)
         
         context_data = {
             'user_id': current_user.id,
-            'current_recipe_id': active_session.recipe_id if active_session else None,
-            'current_step': active_session.current_step if active_session else None,
+            'current_recipe_id': state['recipe_id'] if state else None,
+            'current_step': state['current_step'] if state else None,
             'context': context
         }
         
@@ -784,6 +1261,11 @@ def ai_query():
             'response': 'An error occurred while processing your query.'
         })
 
+def get_step_text(state, step_number):
+    """Spoken text of a step of the user's current recipe, or '' if it doesn't exist"""
+    step = cooking_state.step(state, step_number)
+    return (step.voice_instruction or step.instruction) if step else ''
+
 @app.route('/voice_command', methods=['POST'])
 @login_required
 def voice_command():
@@ -792,40 +1274,33 @@ def voice_command():
         data = request.get_json()
         command = data.get('command', '').lower()
         
-        # Get current cooking session
-        active_session = CookingSession.query.filter_by(
-            user_id=current_user.id,
-            is_active=True
-        ).first()
+        # Get current cooking session, recipe and steps
+        state = cooking_state.get(current_user.id)
         
-        if not active_session:
+        if not state:
             return jsonify({
                 'success': False,
                 'message': 'No active cooking session. Please start a recipe first.'
             })
         
-        recipe = Recipe.query.get(active_session.recipe_id)
-        if not recipe:
-            return jsonify({
-                'success': False,
-                'message': 'Recipe not found.'
-            })
+        recipe_id = state['recipe_id']
+        current_step = state['current_step']
         
-        current_step = active_session.current_step
-        total_steps = len(recipe.steps)
+        # Moves are relative to the stored step, so write any step change still queued from the step pages first
+        if command in ('next_step', 'previous_step') or command.startswith('go_to_step'):
+            cooking_state.flush_session(state['session_id'])
         
         if command == 'next_step':
-            if current_step < total_steps:
-                active_session.current_step += 1
-                db.session.commit()
-                # Get new step
-                new_step_obj = recipe.steps[active_session.current_step - 1] if recipe.steps else None
-                step_text = (new_step_obj.voice_instruction or new_step_obj.instruction) if new_step_obj else ''
+            # Bounds check and increment happen in one UPDATE, so concurrent commands can't skip or overshoot
+            new_step = session_manager.move(state['session_id'], 1)
+            if new_step is not None:
+                cooking_state.set_step(current_user.id, new_step, persisted=True)
+                step_text = get_step_text(state, new_step)
                 return jsonify({
                     'success': True,
-                    'message': f'Moving to step {active_session.current_step} of {recipe.title}',
+                    'message': f'Moving to step {new_step} of {state["recipe_title"]}',
                     'step_instruction': step_text,
-                    'redirect_url': url_for('recipe_step', recipe_id=recipe.id, step_number=active_session.current_step)
+                    'redirect_url': url_for('recipe_step', recipe_id=recipe_id, step_number=new_step)
                 })
             else:
                 return jsonify({
@@ -834,17 +1309,15 @@ def voice_command():
                 })
         
         elif command == 'previous_step':
-            if current_step > 1:
-                active_session.current_step -= 1
-                db.session.commit()
-                # Get new step
-                new_step_obj = recipe.steps[active_session.current_step - 1] if recipe.steps else None
-                step_text = (new_step_obj.voice_instruction or new_step_obj.instruction) if new_step_obj else ''
+            new_step = session_manager.move(state['session_id'], -1)
+            if new_step is not None:
+                cooking_state.set_step(current_user.id, new_step, persisted=True)
+                step_text = get_step_text(state, new_step)
                 return jsonify({
                     'success': True,
-                    'message': f'Moving to step {active_session.current_step} of {recipe.title}',
+                    'message': f'Moving to step {new_step} of {state["recipe_title"]}',
                     'step_instruction': step_text,
-                    'redirect_url': url_for('recipe_step', recipe_id=recipe.id, step_number=active_session.current_step)
+                    'redirect_url': url_for('recipe_step', recipe_id=recipe_id, step_number=new_step)
                 })
             else:
                 return jsonify({
@@ -853,9 +1326,8 @@ def voice_command():
                 })
         
         elif command == 'repeat_step':
-            current_step_obj = recipe.steps[current_step - 1] if recipe.steps else None
-            step_text = (current_step_obj.voice_instruction or current_step_obj.instruction) if current_step_obj else ''
-            if current_step_obj:
+            step_text = get_step_text(state, current_step)
+            if step_text:
                 return jsonify({
                     'success': True,
                     'message': f'Step {current_step}: {step_text}',
@@ -870,7 +1342,7 @@ def voice_command():
         elif command == 'show_ingredients':
             return jsonify({
                 'success': True,
-                'message': f'Ingredients for {recipe.title}: {recipe.ingredients}'
+                'message': f'Ingredients for {state["recipe_title"]}: {state["ingredients"]}'
             })
         
         elif command == 'set_timer':
@@ -880,9 +1352,9 @@ def voice_command():
             })
         
         elif command == 'stop_cooking':
-            active_session.is_active = False
-            active_session.completed_at = datetime.utcnow()
-            db.session.commit()
+            session_manager.end(state['session_id'])
+            cooking_state.invalidate(current_user.id)
+            publish_session(current_user.id)
             return jsonify({
                 'success': True,
                 'message': 'Cooking session ended. You can start a new recipe anytime.',
@@ -901,11 +1373,9 @@ def voice_command():
             match = re.search(r'go_to_step\s*(\d+)', command)
             if match:
                 step_num = int(match.group(1))
-                if 1 <= step_num <= total_steps:
-                    active_session.current_step = step_num
-                    db.session.commit()
-                    step_obj = recipe.steps[step_num - 1] if recipe.steps else None
-                    step_text = (step_obj.voice_instruction or step_obj.instruction) if step_obj else ''
+                if session_manager.jump(state['session_id'], step_num) is not None:
+                    cooking_state.set_step(current_user.id, step_num, persisted=True)
+                    step_text = get_step_text(state, step_num)
                     return jsonify({
                         'success': True,
                         'message': f'Jumped to step {step_num}: {step_text}',
@@ -923,7 +1393,7 @@ def voice_command():
                 })
         
         elif command == 'list_all_steps':
-            steps_text = '\n'.join([f"Step {step.step_number}: {step.voice_instruction or step.instruction}" for step in recipe.steps])
+            steps_text = '\n'.join([f"Step {step.step_number}: {step.voice_instruction or step.instruction}" for step in cooking_state.steps(state)])
             return jsonify({
                 'success': True,
                 'message': steps_text
@@ -952,12 +1422,8 @@ def voice_command():
             'message': 'An error occurred while processing your command.'
         })
 
-@app.route('/populate_all')
-def populate_all():
-    from models.db_models import User, Recipe, Step
-    from werkzeug.security import generate_password_hash
-    db.create_all()
-    # Ensure permanent admin user
+def ensure_admin():
+    """Create the permanent admin user, or reset its password and admin flag"""
     admin = User.query.filter_by(username='Vishwas').first()
     if not admin:
         admin = User(
@@ -967,329 +1433,36 @@ def populate_all():
             is_admin=True
         )
         db.session.add(admin)
-        db.session.commit()
     else:
         admin.password_hash = generate_password_hash('Vish@1kb')
         admin.is_admin = True
-        db.session.commit()
+    db.session.commit()
+    return admin
+
+def seed_sample_recipes(admin):
+    """Load the bundled sample recipes, upserting on title"""
+    totals = load_recipes(read_recipe_file(SAMPLE_RECIPES_PATH), admin.id)
+    recipes_reloaded()
+    return totals
 
+@app.route('/populate_all')
+def populate_all():
+    upgrade_database()
+    admin = ensure_admin()
     # Populate sample recipes if none exist
     if Recipe.query.count() == 0:
-        recipes_data = [
-            {
-                'title': 'Butter Chicken',
-                'category': 'Main Course',
-                'ingredients': '''500g chicken breast, cubed\n1 cup yogurt\n2 tbsp tandoori masala\n2 tbsp butter\n1 cup tomato puree\n1/2 cup cream\n1 tbsp kasoori methi\n1 tsp garam masala\n1 tsp red chili powder\n1 tbsp ginger-garlic paste\nSalt to taste''',
-                'dietary_tags': 'non-vegetarian,gluten-free,creamy',
-                'steps': [
-                    'Marinate chicken with yogurt, tandoori masala, and salt for 2 hours.',
-                    'Grill or bake chicken until charred and cooked through.',
-                    'Heat butter in a pan, add ginger-garlic paste, cook for 2 minutes.',
-                    'Add tomato puree, spices, and cook until oil separates.',
-                    'Add cream, kasoori methi, and cooked chicken.',
-                    'Simmer for 10 minutes, garnish with cream and butter.',
-                    'Serve hot with naan or rice.'
-                ]
-            },
-            {
-                'title': 'Vegetable Stir Fry',
-                'category': 'Main Course',
-                'ingredients': '''2 tbsp vegetable oil\n2 cloves garlic, minced\n1 inch ginger, minced\n2 bell peppers, sliced\n1 cup broccoli florets\n1 cup snap peas\n2 carrots, julienned\n2 tbsp soy sauce\n1 tbsp oyster sauce\n1 tsp cornstarch\n1/4 cup water\nSalt and pepper to taste''',
-                'dietary_tags': 'vegetarian,vegan,gluten-free',
-                'steps': [
-                    'Heat oil in a wok or large skillet over high heat.',
-                    'Add garlic and ginger, stir-fry for 30 seconds until fragrant.',
-                    'Add bell peppers and carrots, stir-fry for 2 minutes.',
-                    'Add broccoli and snap peas, continue stir-frying for 3 minutes.',
-                    'Mix cornstarch with water and add to pan along with soy sauce and oyster sauce.',
-                    'Stir until sauce thickens, about 1-2 minutes.',
-                    'Season with salt and pepper, serve hot over steamed rice.'
-                ]
-            },
-            {
-                'title': 'Chocolate Chip Cookies',
-                'category': 'Dessert',
-                'ingredients': '''2 1/4 cups all-purpose flour\n1 tsp baking soda\n1 tsp salt\n1 cup unsalted butter, softened\n3/4 cup granulated sugar\n3/4 cup brown sugar\n2 large eggs\n2 tsp vanilla extract\n2 cups chocolate chips''',
-                'dietary_tags': 'vegetarian,contains-dairy',
-                'steps': [
-                    'Preheat oven to 375°F (190°C) and line baking sheets with parchment paper.',
-                    'In a bowl, whisk together flour, baking soda, and salt.',
-                    'In a large bowl, cream together butter and both sugars until light and fluffy.',
-                    'Beat in eggs one at a time, then stir in vanilla.',
-                    'Gradually mix in the flour mixture until just combined.',
-                    'Stir in chocolate chips.',
-                    'Drop rounded tablespoons of dough onto prepared baking sheets.',
-                    'Bake for 9-11 minutes until golden brown around the edges.',
-                    'Let cool on baking sheets for 5 minutes, then transfer to wire racks.'
-                ]
-            },
-            {
-                'title': 'Greek Salad',
-                'category': 'Salad',
-                'ingredients': '''1 large cucumber, diced\n4 large tomatoes, diced\n1 red onion, thinly sliced\n1 cup Kalamata olives\n200g feta cheese, cubed\n2 tbsp extra virgin olive oil\n1 tbsp red wine vinegar\n1 tsp dried oregano\nSalt and pepper to taste''',
-                'dietary_tags': 'vegetarian,gluten-free',
-                'steps': [
-                    'In a large bowl, combine cucumber, tomatoes, and red onion.',
-                    'Add Kalamata olives and feta cheese cubes.',
-                    'In a small bowl, whisk together olive oil, red wine vinegar, and oregano.',
-                    'Pour dressing over the salad and gently toss to combine.',
-                    'Season with salt and pepper to taste.',
-                    'Let the salad sit for 10 minutes to allow flavors to meld.',
-                    'Serve chilled as a refreshing side dish or light meal.'
-                ]
-            },
-            {
-                'title': 'Avocado Toast',
-                'category': 'Breakfast',
-                'ingredients': '''2 slices whole grain bread\n1 ripe avocado\n1 lemon\nSalt and pepper to taste\nRed pepper flakes (optional)\nMicrogreens or sprouts (optional)''',
-                'dietary_tags': 'vegetarian,vegan,gluten-free',
-                'steps': [
-                    'Toast the bread until golden brown and crispy.',
-                    'Cut the avocado in half, remove the pit, and scoop the flesh into a bowl.',
-                    'Mash the avocado with a fork until smooth but still slightly chunky.',
-                    'Squeeze lemon juice over the mashed avocado and season with salt and pepper.',
-                    'Spread the avocado mixture evenly over the toasted bread.',
-                    'Sprinkle with red pepper flakes if desired.',
-                    'Top with microgreens or sprouts for extra nutrition and presentation.',
-                    'Serve immediately while the toast is still warm and crispy.'
-                ]
-            },
-            {
-                'title': 'Spaghetti Carbonara',
-                'category': 'Main Course',
-                'ingredients': '''200g spaghetti\n100g pancetta\n2 large eggs\n50g pecorino cheese\n50g parmesan\n2 cloves garlic, peeled\nSalt and black pepper to taste''',
-                'dietary_tags': 'non-vegetarian,contains-dairy',
-                'steps': [
-                    'Cook spaghetti in salted boiling water until al dente.',
-                    'Fry pancetta with garlic until crisp, then remove garlic.',
-                    'Beat eggs and mix with grated cheeses.',
-                    'Drain pasta and combine with pancetta.',
-                    'Remove from heat, add egg and cheese mixture, and toss quickly.',
-                    'Season with salt and pepper, serve immediately.'
-                ]
-            },
-            {
-                'title': 'Margherita Pizza',
-                'category': 'Main Course',
-                'ingredients': '''1 pizza dough base\n100g tomato sauce\n125g mozzarella cheese\nFresh basil leaves\n2 tbsp olive oil\nSalt to taste''',
-                'dietary_tags': 'vegetarian,contains-dairy',
-                'steps': [
-                    'Preheat oven to 250°C (480°F).',
-                    'Spread tomato sauce over the pizza base.',
-                    'Add sliced mozzarella and drizzle with olive oil.',
-                    'Bake for 10-12 minutes until crust is golden.',
-                    'Top with fresh basil leaves and serve hot.'
-                ]
-            },
-            {
-                'title': 'Pancakes',
-                'category': 'Breakfast',
-                'ingredients': '''1 cup all-purpose flour\n2 tbsp sugar\n2 tsp baking powder\nPinch of salt\n1 cup milk\n1 egg\n2 tbsp melted butter\nMaple syrup to serve''',
-                'dietary_tags': 'vegetarian,contains-dairy',
-                'steps': [
-                    'Mix flour, sugar, baking powder, and salt in a bowl.',
-                    'Whisk milk, egg, and melted butter in another bowl.',
-                    'Combine wet and dry ingredients until just mixed.',
-                    'Heat a non-stick pan and pour batter to form pancakes.',
-                    'Cook until bubbles form, flip and cook until golden.',
-                    'Serve warm with maple syrup.'
-                ]
-            },
-            {
-                'title': 'Chicken Caesar Salad',
-                'category': 'Salad',
-                'ingredients': '''2 chicken breasts\n1 romaine lettuce\n50g parmesan cheese\n1 cup croutons\nCaesar dressing\nSalt and pepper to taste''',
-                'dietary_tags': 'non-vegetarian,contains-dairy',
-                'steps': [
-                    'Season and grill chicken breasts, then slice.',
-                    'Chop romaine lettuce and place in a bowl.',
-                    'Add sliced chicken, croutons, and shaved parmesan.',
-                    'Drizzle with Caesar dressing and toss gently.',
-                    'Serve immediately.'
-                ]
-            },
-            {
-                'title': 'Tacos',
-                'category': 'Main Course',
-                'ingredients': '''8 small tortillas\n250g ground beef or chicken\n1 onion, chopped\n1 tomato, diced\nLettuce, shredded\nCheddar cheese, grated\nTaco seasoning\nSour cream and salsa to serve''',
-                'dietary_tags': 'non-vegetarian,contains-dairy',
-                'steps': [
-                    'Cook ground meat with taco seasoning and chopped onion.',
-                    'Warm tortillas in a pan.',
-                    'Fill tortillas with meat, lettuce, tomato, and cheese.',
-                    'Top with sour cream and salsa.',
-                    'Serve immediately.'
-                ]
-            },
-            {
-                'title': 'Palak Paneer',
-                'category': 'Main Course',
-                'ingredients': '''200g paneer\n300g spinach\n2 onions\n2 tomatoes\n2 green chilies\n1 tsp ginger-garlic paste\n1 tsp cumin seeds\n1 tsp garam masala\nSalt to taste''',
-                'dietary_tags': 'vegetarian,gluten-free',
-                'steps': [
-                    'Blanch spinach and blend to a puree.',
-                    'Fry cumin seeds, onions, and ginger-garlic paste.',
-                    'Add tomatoes and cook until soft.',
-                    'Add spinach puree and spices, cook for 5 minutes.',
-                    'Add paneer cubes and simmer for 5 minutes.',
-                    'Serve hot with naan or rice.'
-                ]
-            },
-            {
-                'title': 'Beef Stroganoff',
-                'category': 'Main Course',
-                'ingredients': '''500g beef sirloin\n1 onion\n200g mushrooms\n1 cup sour cream\n2 tbsp flour\n2 tbsp butter\n1 cup beef broth\nSalt and pepper to taste''',
-                'dietary_tags': 'non-vegetarian,contains-dairy',
-                'steps': [
-                    'Slice beef and brown in butter.',
-                    'Remove beef, sauté onions and mushrooms.',
-                    'Add flour, then beef broth, and simmer.',
-                    'Return beef to pan, stir in sour cream.',
-                    'Simmer until thickened, serve over noodles.'
-                ]
-            },
-            {
-                'title': 'Miso Soup',
-                'category': 'Soup',
-                'ingredients': '''4 cups dashi stock\n3 tbsp miso paste\n100g tofu\n2 green onions\n1 sheet nori''',
-                'dietary_tags': 'vegetarian,gluten-free',
-                'steps': [
-                    'Heat dashi stock to a simmer.',
-                    'Add tofu cubes and sliced green onions.',
-                    'Dissolve miso paste in a little hot broth, then add to pot.',
-                    'Add nori strips, simmer 2 minutes, serve hot.'
-                ]
-            },
-            {
-                'title': 'Fish Tacos',
-                'category': 'Main Course',
-                'ingredients': '''300g white fish fillets\n8 small tortillas\n1 cup cabbage, shredded\n1 tomato, diced\n1/2 cup sour cream\n1 lime\nTaco seasoning\nSalt and pepper to taste''',
-                'dietary_tags': 'non-vegetarian',
-                'steps': [
-                    'Season fish with taco seasoning, salt, and pepper.',
-                    'Grill or pan-fry fish until cooked through.',
-                    'Warm tortillas, fill with fish, cabbage, and tomato.',
-                    'Top with sour cream and a squeeze of lime.'
-                ]
-            },
-            {
-                'title': 'Banana Bread',
-                'category': 'Dessert',
-                'ingredients': '''2 cups all-purpose flour\n1 tsp baking soda\n1/4 tsp salt\n1/2 cup butter\n3/4 cup brown sugar\n2 eggs\n2 1/3 cups mashed bananas''',
-                'dietary_tags': 'vegetarian,contains-dairy',
-                'steps': [
-                    'Preheat oven to 175°C (350°F).',
-                    'Mix flour, baking soda, and salt.',
-                    'Cream butter and sugar, add eggs and bananas.',
-                    'Combine wet and dry ingredients.',
-                    'Pour into greased loaf pan and bake 60 minutes.'
-                ]
-            },
-            {
-                'title': 'Shakshuka',
-                'category': 'Breakfast',
-                'ingredients': '''4 eggs\n1 onion\n1 bell pepper\n2 cloves garlic\n400g canned tomatoes\n1 tsp cumin\n1 tsp paprika\nSalt and pepper to taste''',
-                'dietary_tags': 'vegetarian,gluten-free',
-                'steps': [
-                    'Sauté onion, bell pepper, and garlic.',
-                    'Add tomatoes and spices, simmer 10 minutes.',
-                    'Make wells and crack eggs into sauce.',
-                    'Cover and cook until eggs are set.',
-                    'Serve with bread.'
-                ]
-            },
-            {
-                'title': 'Egg Fried Rice',
-                'category': 'Main Course',
-                'ingredients': '''2 cups cooked rice\n2 eggs\n1 cup mixed vegetables\n2 tbsp soy sauce\n2 green onions\n1 tbsp oil\nSalt and pepper to taste''',
-                'dietary_tags': 'vegetarian',
-                'steps': [
-                    'Heat oil in a wok, scramble eggs and set aside.',
-                    'Sauté vegetables, add rice and soy sauce.',
-                    'Add eggs back, toss with green onions.',
-                    'Season and serve hot.'
-                ]
-            },
-            {
-                'title': 'Lemon Garlic Salmon',
-                'category': 'Main Course',
-                'ingredients': '''2 salmon fillets\n2 tbsp lemon juice\n2 cloves garlic, minced\n1 tbsp olive oil\nSalt and pepper to taste''',
-                'dietary_tags': 'non-vegetarian,gluten-free',
-                'steps': [
-                    'Marinate salmon with lemon juice, garlic, salt, and pepper.',
-                    'Pan-sear or bake until cooked through.',
-                    'Serve with vegetables or rice.'
-                ]
-            },
-            {
-                'title': 'French Toast',
-                'category': 'Breakfast',
-                'ingredients': '''4 slices bread\n2 eggs\n1/2 cup milk\n1 tsp cinnamon\n1 tsp vanilla extract\nButter for frying\nMaple syrup to serve''',
-                'dietary_tags': 'vegetarian,contains-dairy',
-                'steps': [
-                    'Whisk eggs, milk, cinnamon, and vanilla.',
-                    'Dip bread slices in mixture.',
-                    'Fry in butter until golden on both sides.',
-                    'Serve with maple syrup.'
-                ]
-            },
-            {
-                'title': 'Quinoa Salad',
-                'category': 'Salad',
-                'ingredients': '''1 cup quinoa\n2 cups water\n1 cucumber, diced\n1 bell pepper, diced\n1/2 cup cherry tomatoes\n1/4 cup olive oil\n2 tbsp lemon juice\nSalt and pepper to taste''',
-                'dietary_tags': 'vegan,gluten-free,healthy',
-                'steps': [
-                    'Cook quinoa in water until fluffy.',
-                    'Mix with vegetables in a bowl.',
-                    'Whisk olive oil and lemon juice, pour over salad.',
-                    'Toss and season to taste.'
-                ]
-            }
-        ]
-        for r in recipes_data:
-            recipe = Recipe(
-                title=r['title'],
-                category=r['category'],
-                ingredients=r['ingredients'],
-                dietary_tags=r['dietary_tags'],
-                user_id=admin.id
-            )
-            db.session.add(recipe)
-            db.session.flush()
-            for i, step_text in enumerate(r['steps'], 1):
-                step = Step(
-                    recipe_id=recipe.id,
-                    step_number=i,
-                    instruction=step_text
-                )
-                db.session.add(step)
-        db.session.commit()
+        seed_sample_recipes(admin)
     return "Admin and sample recipes populated!"
 
 @app.route('/populate_db')
 def populate_db_route():
-    import populate_db
-    from models.db_models import Recipe
+    admin = ensure_admin()
+    seed_sample_recipes(admin)
     return f"Database populated! Recipe count: {Recipe.query.count()}"
 
 @app.route('/create_admin')
 def create_admin():
-    from models.db_models import User
-    from werkzeug.security import generate_password_hash
-    admin = User.query.filter_by(username='Vishwas').first()
-    if not admin:
-        admin = User(
-            username='Vishwas',
-            email='vishwas@example.com',
-            password_hash=generate_password_hash('Vish@1kb'),
-            is_admin=True
-        )
-        db.session.add(admin)
-        db.session.commit()
-    else:
-        admin.password_hash = generate_password_hash('Vish@1kb')
-        admin.is_admin = True
-        db.session.commit()
+    ensure_admin()
     return "Admin user now has username: Vishwas and password: Vish@1kb"
 
 @app.route('/debug_users')
@@ -1299,196 +1472,87 @@ def debug_users():
     return "<br>".join([f"username: {u.username}, email: {u.email}, is_admin: {u.is_admin}" for u in users])
 
 @app.route('/debug_recipes')
+@read_only
 def debug_recipes():
     from models.db_models import Recipe
     recipes = Recipe.query.all()
     return "<br>".join([f"title: {r.title}" for r in recipes])
 
+@app.cli.command('seed')
+def seed_command():
+    """Create the admin user and load the sample recipes."""
+    upgrade_database()
+    admin = ensure_admin()
+    totals = seed_sample_recipes(admin)
+    print(f"Seeded sample recipes: {totals['inserted']} inserted, {totals['updated']} updated")
+
+@app.cli.command('load-recipes')
+@click.argument('path', required=False)
+@click.option('--synthetic', type=int, default=0, help='Generate this many synthetic recipes instead of reading PATH.')
+@click.option('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, show_default=True, help='Recipes per transaction.')
+def load_recipes_command(path, synthetic, chunk_size):
+    """Bulk load recipes from a JSON or NDJSON file, upserting on title."""
+    if not path and not synthetic:
+        raise click.UsageError('Give a PATH or --synthetic N.')
+    upgrade_database()
+    admin = ensure_admin()
+    records = synthetic_recipes(synthetic) if synthetic else read_recipe_file(path)
+    started = time.perf_counter()
+    totals = load_recipes(records, admin.id, chunk_size=chunk_size,
+                          progress=lambda t: print(f"  {t['inserted'] + t['updated']} recipes...", end='\r'))
+    recipes_reloaded()
+    print(f"Loaded {totals['inserted']} new and {totals['updated']} updated recipes "
+          f"({totals['steps']} steps) in {time.perf_counter() - started:.1f}s")
+
+@app.cli.command('estimate-step-times')
+def estimate_step_times_command():
+    """Read step durations from instructions saved without an estimated time."""
+    steps, recipes = backfill_step_times()
+    recipes_reloaded()
+    print(f"Estimated {steps} steps and filled the cooking time of {recipes} recipes")
+
+@app.cli.group('voice-log')
+def voice_log_cli():
+    """Maintain the voice command log."""
+
+@voice_log_cli.command('rollup')
+def voice_log_rollup_command():
+    """Fold new voice commands into the hourly and daily rollups."""
+    print(f"Rolled up {command_retention.rollup()} voice commands")
+
+@voice_log_cli.command('archive')
+@click.option('--days', type=int, default=None, help='Retention window in days (default: VOICE_LOG_RETENTION_DAYS or 30).')
+def voice_log_archive_command(days):
+    """Roll up, then archive and delete voice commands older than the retention window."""
+    if days is not None:
+        command_retention.retention_days = days
+    rolled_up = command_retention.rollup()
+    archived = command_retention.archive()
+    print(f"Rolled up {rolled_up} and archived {archived} voice commands to {command_retention.archive_dir}")
+
+@app.cli.command('expire-sessions')
+@click.option('--idle-minutes', type=int, default=None, help='Idle timeout in minutes (default: COOKING_SESSION_IDLE_MINUTES or 240).')
+def expire_sessions_command(idle_minutes):
+    """Deactivate cooking sessions that have been idle for too long."""
+    upgrade_database()
+    if idle_minutes is not None:
+        session_manager.idle_minutes = idle_minutes
+    print(f"Expired {session_manager.expire_idle()} idle cooking sessions")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress the static CSS and JS."""
+    manifest = assets.build()
+    for name, built in sorted(manifest.items()):
+        print(f"  {name} -> {built}")
+    print(f"Built {len(manifest)} assets into {assets.dist_folder}")
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        # Ensure permanent admin user
-        admin = User.query.filter_by(username='Vishwas').first()
-        if not admin:
-            admin = User(
-                username='Vishwas',
-                email='vishwas@example.com',
-                password_hash=generate_password_hash('Vish@1kb'),
-                is_admin=True
-            )
-            db.session.add(admin)
-            db.session.commit()
-        else:
-            admin.password_hash = generate_password_hash('Vish@1kb')
-            admin.is_admin = True
-            db.session.commit()
-
+        upgrade_database()
+        admin = ensure_admin()
         # Populate sample recipes if none exist
         if Recipe.query.count() == 0:
-            recipes_data = [
-                {
-                    'title': 'Butter Chicken',
-                    'category': 'Main Course',
-                    'ingredients': '''500g chicken breast, cubed\n1 cup yogurt\n2 tbsp tandoori masala\n2 tbsp butter\n1 cup tomato puree\n1/2 cup cream\n1 tbsp kasoori methi\n1 tsp garam masala\n1 tsp red chili powder\n1 tbsp ginger-garlic paste\nSalt to taste''',
-                    'dietary_tags': 'non-vegetarian,gluten-free,creamy',
-                    'steps': [
-                        'Marinate chicken with yogurt, tandoori masala, and salt for 2 hours.',
-                        'Grill or bake chicken until charred and cooked through.',
-                        'Heat butter in a pan, add ginger-garlic paste, cook for 2 minutes.',
-                        'Add tomato puree, spices, and cook until oil separates.',
-                        'Add cream, kasoori methi, and cooked chicken.',
-                        'Simmer for 10 minutes, garnish with cream and butter.',
-                        'Serve hot with naan or rice.'
-                    ]
-                },
-                {
-                    'title': 'Vegetable Stir Fry',
-                    'category': 'Main Course',
-                    'ingredients': '''2 tbsp vegetable oil\n2 cloves garlic, minced\n1 inch ginger, minced\n2 bell peppers, sliced\n1 cup broccoli florets\n1 cup snap peas\n2 carrots, julienned\n2 tbsp soy sauce\n1 tbsp oyster sauce\n1 tsp cornstarch\n1/4 cup water\nSalt and pepper to taste''',
-                    'dietary_tags': 'vegetarian,vegan,gluten-free',
-                    'steps': [
-                        'Heat oil in a wok or large skillet over high heat.',
-                        'Add garlic and ginger, stir-fry for 30 seconds until fragrant.',
-                        'Add bell peppers and carrots, stir-fry for 2 minutes.',
-                        'Add broccoli and snap peas, continue stir-frying for 3 minutes.',
-                        'Mix cornstarch with water and add to pan along with soy sauce and oyster sauce.',
-                        'Stir until sauce thickens, about 1-2 minutes.',
-                        'Season with salt and pepper, serve hot over steamed rice.'
-                    ]
-                },
-                {
-                    'title': 'Chocolate Chip Cookies',
-                    'category': 'Dessert',
-                    'ingredients': '''2 1/4 cups all-purpose flour\n1 tsp baking soda\n1 tsp salt\n1 cup unsalted butter, softened\n3/4 cup granulated sugar\n3/4 cup brown sugar\n2 large eggs\n2 tsp vanilla extract\n2 cups chocolate chips''',
-                    'dietary_tags': 'vegetarian,contains-dairy',
-                    'steps': [
-                        'Preheat oven to 375°F (190°C) and line baking sheets with parchment paper.',
-                        'In a bowl, whisk together flour, baking soda, and salt.',
-                        'In a large bowl, cream together butter and both sugars until light and fluffy.',
-                        'Beat in eggs one at a time, then stir in vanilla.',
-                        'Gradually mix in the flour mixture until just combined.',
-                        'Stir in chocolate chips.',
-                        'Drop rounded tablespoons of dough onto prepared baking sheets.',
-                        'Bake for 9-11 minutes until golden brown around the edges.',
-                        'Let cool on baking sheets for 5 minutes, then transfer to wire racks.'
-                    ]
-                },
-                {
-                    'title': 'Greek Salad',
-                    'category': 'Salad',
-                    'ingredients': '''1 large cucumber, diced\n4 large tomatoes, diced\n1 red onion, thinly sliced\n1 cup Kalamata olives\n200g feta cheese, cubed\n2 tbsp extra virgin olive oil\n1 tbsp red wine vinegar\n1 tsp dried oregano\nSalt and pepper to taste''',
-                    'dietary_tags': 'vegetarian,gluten-free',
-                    'steps': [
-                        'In a large bowl, combine cucumber, tomatoes, and red onion.',
-                        'Add Kalamata olives and feta cheese cubes.',
-                        'In a small bowl, whisk together olive oil, red wine vinegar, and oregano.',
-                        'Pour dressing over the salad and gently toss to combine.',
-                        'Season with salt and pepper to taste.',
-                        'Let the salad sit for 10 minutes to allow flavors to meld.',
-                        'Serve chilled as a refreshing side dish or light meal.'
-                    ]
-                },
-                {
-                    'title': 'Avocado Toast',
-                    'category': 'Breakfast',
-                    'ingredients': '''2 slices whole grain bread\n1 ripe avocado\n1 lemon\nSalt and pepper to taste\nRed pepper flakes (optional)\nMicrogreens or sprouts (optional)''',
-                    'dietary_tags': 'vegetarian,vegan,gluten-free',
-                    'steps': [
-                        'Toast the bread until golden brown and crispy.',
-                        'Cut the avocado in half, remove the pit, and scoop the flesh into a bowl.',
-                        'Mash the avocado with a fork until smooth but still slightly chunky.',
-                        'Squeeze lemon juice over the mashed avocado and season with salt and pepper.',
-                        'Spread the avocado mixture evenly over the toasted bread.',
-                        'Sprinkle with red pepper flakes if desired.',
-                        'Top with microgreens or sprouts for extra nutrition and presentation.',
-                        'Serve immediately while the toast is still warm and crispy.'
-                    ]
-                },
-                {
-                    'title': 'Spaghetti Carbonara',
-                    'category': 'Main Course',
-                    'ingredients': '''200g spaghetti\n100g pancetta\n2 large eggs\n50g pecorino cheese\n50g parmesan\n2 cloves garlic, peeled\nSalt and black pepper to taste''',
-                    'dietary_tags': 'non-vegetarian,contains-dairy',
-                    'steps': [
-                        'Cook spaghetti in salted boiling water until al dente.',
-                        'Fry pancetta with garlic until crisp, then remove garlic.',
-                        'Beat eggs and mix with grated cheeses.',
-                        'Drain pasta and combine with pancetta.',
-                        'Remove from heat, add egg and cheese mixture, and toss quickly.',
-                        'Season with salt and pepper, serve immediately.'
-                    ]
-                },
-                {
-                    'title': 'Margherita Pizza',
-                    'category': 'Main Course',
-                    'ingredients': '''1 pizza dough base\n100g tomato sauce\n125g mozzarella cheese\nFresh basil leaves\n2 tbsp olive oil\nSalt to taste''',
-                    'dietary_tags': 'vegetarian,contains-dairy',
-                    'steps': [
-                        'Preheat oven to 250°C (480°F).',
-                        'Spread tomato sauce over the pizza base.',
-                        'Add sliced mozzarella and drizzle with olive oil.',
-                        'Bake for 10-12 minutes until crust is golden.',
-                        'Top with fresh basil leaves and serve hot.'
-                    ]
-                },
-                {
-                    'title': 'Pancakes',
-                    'category': 'Breakfast',
-                    'ingredients': '''1 cup all-purpose flour\n2 tbsp sugar\n2 tsp baking powder\nPinch of salt\n1 cup milk\n1 egg\n2 tbsp melted butter\nMaple syrup to serve''',
-                    'dietary_tags': 'vegetarian,contains-dairy',
-                    'steps': [
-                        'Mix flour, sugar, baking powder, and salt in a bowl.',
-                        'Whisk milk, egg, and melted butter in another bowl.',
-                        'Combine wet and dry ingredients until just mixed.',
-                        'Heat a non-stick pan and pour batter to form pancakes.',
-                        'Cook until bubbles form, flip and cook until golden.',
-                        'Serve warm with maple syrup.'
-                    ]
-                },
-                {
-                    'title': 'Chicken Caesar Salad',
-                    'category': 'Salad',
-                    'ingredients': '''2 chicken breasts\n1 romaine lettuce\n50g parmesan cheese\n1 cup croutons\nCaesar dressing\nSalt and pepper to taste''',
-                    'dietary_tags': 'non-vegetarian,contains-dairy',
-                    'steps': [
-                        'Season and grill chicken breasts, then slice.',
-                        'Chop romaine lettuce and place in a bowl.',
-                        'Add sliced chicken, croutons, and shaved parmesan.',
-                        'Drizzle with Caesar dressing and toss gently.',
-                        'Serve immediately.'
-                    ]
-                },
-                {
-                    'title': 'Tacos',
-                    'category': 'Main Course',
-                    'ingredients': '''8 small tortillas\n250g ground beef or chicken\n1 onion, chopped\n1 tomato, diced\nLettuce, shredded\nCheddar cheese, grated\nTaco seasoning\nSour cream and salsa to serve''',
-                    'dietary_tags': 'non-vegetarian,contains-dairy',
-                    'steps': [
-                        'Cook ground meat with taco seasoning and chopped onion.',
-                        'Warm tortillas in a pan.',
-                        'Fill tortillas with meat, lettuce, tomato, and cheese.',
-                        'Top with sour cream and salsa.',
-                        'Serve immediately.'
-                    ]
-                }
-            ]
-            for r in recipes_data:
-                recipe = Recipe(
-                    title=r['title'],
-                    category=r['category'],
-                    ingredients=r['ingredients'],
-                    dietary_tags=r['dietary_tags'],
-                    user_id=admin.id
-                )
-                db.session.add(recipe)
-                db.session.flush()
-                for i, step_text in enumerate(r['steps'], 1):
-                    step = Step(
-                        recipe_id=recipe.id,
-                        step_number=i,
-                        instruction=step_text
-                    )
-                    db.session.add(step)
-            db.session.commit()
+            seed_sample_recipes(admin)
     
     app.run(debug=True) 
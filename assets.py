@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Output name -> source files under static/, joined in order
+BUNDLES = {
+    'css/style.css': ['css/style.css'],
+    'js/base.js': ['js/main.js', 'js/mic.js', 'js/timer.js'],
+    'js/main.js': ['js/main.js'],
+    'js/mic.js': ['js/mic.js'],
+    'js/timer.js': ['js/timer.js'],
+    'js/voice_only.js': ['js/voice_only.js'],
+}
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Precompressed variant suffix per Content-Encoding, best first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_js(source):
+    """
+    Drop comment lines, blank lines and indentation. Line breaks are kept,
+    so automatic semicolon insertion and regex literals are unaffected.
+    """
+    lines = []
+    in_block_comment = False
+    for line in source.splitlines():
+        line = line.strip()
+        if in_block_comment:
+            in_block_comment = '*/' not in line
+            continue
+        if line.startswith('/*'):
+            in_block_comment = '*/' not in line
+            continue
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+
+class AssetPipeline:
+    """
+    Fingerprinted, minified and precompressed static assets.
+
+    `flask build-assets` writes each bundle to static/dist as
+    name.<hash>.ext with .gz (and .br, when the brotli package is installed)
+    next to it, plus a manifest. Templates link assets through asset_url()
+    and asset_urls(), which point at the fingerprinted file when the
+    manifest has it and at the plain static files otherwise. Fingerprinted
+    files never change, so they are served with a one year immutable
+    Cache-Control and browsers do not ask for them again until a build
+    changes the name.
+    """
+
+    def __init__(self):
+        self.static_folder = None
+        self.dist_folder = None
+        self.manifest = {}
+
+    def init_app(self, app):
+        """
+        Output goes to ASSETS_DIST_FOLDER (default static/dist)
+        """
+        self.static_folder = app.static_folder
+        self.dist_folder = app.config.get('ASSETS_DIST_FOLDER', os.path.join(app.static_folder, 'dist'))
+        self.manifest = self._read_manifest()
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.add_template_global(self.url, 'asset_url')
+        app.add_template_global(self.urls, 'asset_urls')
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.dist_folder, 'manifest.json')
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def url(self, filename):
+        """
+        URL of a static asset, fingerprinted once built
+        """
+        built = self.manifest.get(filename)
+        if built is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=built)
+
+    def urls(self, name):
+        """
+        URLs to load a bundle: the built file, or its sources until it is built
+        """
+        if name in self.manifest:
+            return [self.url(name)]
+        return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+    def build(self):
+        """
+        Build every bundle and write the manifest; files from the previous
+        build are kept so pages still open in a browser keep working, older
+        ones are removed. Returns the new manifest.
+        """
+        manifest = {}
+        for name, sources in BUNDLES.items():
+            minify = minify_css if name.endswith('.css') else minify_js
+            parts = []
+            for source in sources:
+                with open(os.path.join(self.static_folder, source), encoding='utf-8') as f:
+                    parts.append(minify(f.read()))
+            data = (';\n' if name.endswith('.js') else '').join(parts).encode('utf-8')
+
+            stem, ext = os.path.splitext(name)
+            built = f'{stem}.{hashlib.sha1(data).hexdigest()[:12]}{ext}'
+            path = os.path.join(self.dist_folder, built)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+            manifest[name] = built
+
+        keep = set(manifest.values()) | set(self._read_manifest().values())
+        for root, _dirs, files in os.walk(self.dist_folder):
+            for file in files:
+                rel = os.path.relpath(os.path.join(root, file), self.dist_folder).replace(os.sep, '/')
+                base = re.sub(r'\.(gz|br)$', '', rel)
+                if rel != 'manifest.json' and base not in keep:
+                    os.remove(os.path.join(root, file))
+
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        self.manifest = manifest
+        return manifest
+
+    def serve(self, filename):
+        """
+        Send a built asset, precompressed when the client accepts it
+        """
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.isfile(os.path.join(self.dist_folder, filename + suffix)):
+                encoding, filename = name, filename + suffix
+                break
+
+        response = send_from_directory(self.dist_folder, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+# Global asset pipeline instance
+assets = AssetPipeline()
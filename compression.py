@@ -0,0 +1,138 @@
+import threading
+import zlib
+from collections import defaultdict
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'text/event-stream', 'image/svg+xml',
+)
+
+
+class ResponseCompressor:
+    """
+    gzip / brotli compression of dynamic responses.
+
+    A response is compressed when the client accepts an encoding, its
+    mimetype is in the allowlist and it carries no Content-Encoding of its
+    own (precompressed assets, send_file downloads). Buffered bodies below
+    the minimum size go out as they are, since the headers would eat the
+    saving. Streamed responses (NDJSON exports, event streams) are
+    compressed chunk by chunk with a sync flush after each one, so every
+    chunk still reaches the client as soon as it is produced.
+
+    A compressed response's ETag becomes weak: the bytes differ per
+    encoding, but conditional requests keep matching.
+    """
+
+    def __init__(self):
+        self.min_size = 500
+        self.mimetypes = DEFAULT_MIMETYPES
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self.streams = True
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        """
+        Settings come from COMPRESS_MIN_SIZE (bytes), COMPRESS_MIMETYPES,
+        COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY and COMPRESS_STREAMS
+        """
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.mimetypes = tuple(app.config.get('COMPRESS_MIMETYPES', self.mimetypes))
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        self.streams = app.config.get('COMPRESS_STREAMS', self.streams)
+        app.after_request(self.compress)
+
+    def _encoding(self):
+        offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(offered)
+
+    def _compressor(self, encoding):
+        """
+        (compress, flush, finish) for one response
+        """
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def _record(self, outcome, bytes_in=0, bytes_out=0):
+        with self._lock:
+            self._counts[outcome] += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def compress(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 304) or request.method == 'HEAD'
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in self.mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.cache_control.no_transform:
+            return response
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if not self.streams:
+                return response
+            response.response = self._stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                self._record('too_small')
+                return response
+            compress, _flush, finish = self._compressor(encoding)
+            compressed = compress(body) + finish()
+            response.set_data(compressed)
+            self._record(encoding, len(body), len(compressed))
+
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _stream(self, chunks, encoding):
+        compress, flush, finish = self._compressor(encoding)
+        bytes_in = bytes_out = 0
+        try:
+            for chunk in chunks:
+                if chunk:
+                    data = compress(chunk) + flush()
+                    bytes_in += len(chunk)
+                    bytes_out += len(data)
+                    yield data
+            data = finish()
+            bytes_out += len(data)
+            yield data
+        finally:
+            self._record(encoding + '_stream', bytes_in, bytes_out)
+
+    def stats(self):
+        """
+        Responses compressed per encoding, and compressed over original bytes
+        """
+        return {
+            'responses': dict(self._counts),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+        }
+
+
+# Global response compressor instance
+compressor = ResponseCompressor()
@@ -0,0 +1,235 @@
+import threading
+from functools import wraps
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_POOL_SIZE': 10,
+    'SQLITE_SERIALIZE_WRITES': True,
+}
+
+# Server databases (Postgres, ...); REPLICA_* keys default to these for the replica
+POOL_DEFAULTS = {
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_TIMEOUT': 10,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_POOL_PRE_PING': True,
+}
+
+REPLICA_BIND = 'replica'
+
+_WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER')
+
+# SQLite database path -> its SQLiteWriterLock
+writer_locks = {}
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def _pool_setting(config, prefix, name):
+    return config.get(f'{prefix}_{name}', config[f'DB_{name}'])
+
+
+def engine_options(uri, config, prefix='DB'):
+    """
+    Engine options suited to a database URI; pool settings come from
+    <prefix>_POOL_SIZE, <prefix>_MAX_OVERFLOW, ... falling back to DB_*
+    """
+    if is_sqlite(uri):
+        options = {
+            # The sqlite3 driver's own lock wait, in seconds; the PRAGMA below sets the same
+            'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000, 'check_same_thread': False},
+        }
+        if make_url(uri).database not in (None, '', ':memory:'):
+            options['pool_size'] = config['SQLITE_POOL_SIZE']
+        return options
+    return {
+        'pool_size': _pool_setting(config, prefix, 'POOL_SIZE'),
+        'max_overflow': _pool_setting(config, prefix, 'MAX_OVERFLOW'),
+        'pool_timeout': _pool_setting(config, prefix, 'POOL_TIMEOUT'),
+        'pool_recycle': _pool_setting(config, prefix, 'POOL_RECYCLE'),
+        'pool_pre_ping': _pool_setting(config, prefix, 'POOL_PRE_PING'),
+    }
+
+
+def configure(app):
+    """
+    Fill in profile defaults and SQLALCHEMY_ENGINE_OPTIONS, and add the read
+    replica bind if SQLALCHEMY_REPLICA_URI is set; options set explicitly in
+    the app config win
+    """
+    for key, value in {**SQLITE_DEFAULTS, **POOL_DEFAULTS}.items():
+        app.config.setdefault(key, value)
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, {'url': replica_uri, **engine_options(replica_uri, app.config, 'REPLICA')})
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def read_only(view):
+    """
+    Run a view's queries against the read replica, when one is configured
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """
+    Sends reads from read_only views to the replica engine; flushes and
+    INSERT/UPDATE/DELETE statements always go to the primary
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not getattr(clause, 'is_dml', False)
+                and has_request_context() and g.get('use_replica')):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class SQLiteWriterLock:
+    """
+    One writer at a time per process.
+
+    A connection takes the lock at its first write statement (the sqlite3
+    driver only opens a transaction there, so no read snapshot is held yet)
+    and gives it back on commit, rollback or return to the pool. The lock is
+    re-entrant so a thread that opens a second session does not deadlock
+    itself, and waits no longer than the busy timeout before leaving it to
+    SQLite. The owning thread is kept with the connection, so a connection
+    returned to the pool from another thread still gives back its hold.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._owner = None
+        self._count = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.stray_releases = 0
+
+    def acquire(self, info):
+        if 'writer_lock_owner' in info:
+            return
+        me = threading.get_ident()
+        with self._condition:
+            if self._owner not in (None, me):
+                self.waits += 1
+                if not self._condition.wait_for(lambda: self._owner is None, timeout=self.timeout):
+                    self.timeouts += 1
+                    return
+            self._owner = me
+            self._count += 1
+        info['writer_lock_owner'] = me
+
+    def release(self, info):
+        owner = info.pop('writer_lock_owner', None)
+        if owner is None:
+            return
+        with self._condition:
+            if self._owner != owner:
+                self.stray_releases += 1
+                print(f"Writer lock released for thread {owner} which no longer holds it")
+                return
+            self._count -= 1
+            if self._count == 0:
+                self._owner = None
+                self._condition.notify()
+
+
+def install_sqlite_profile(engine, config):
+    """
+    Apply the SQLite pragmas and writer lock to an engine
+    """
+    journal_mode = config['SQLITE_JOURNAL_MODE']
+    synchronous = config['SQLITE_SYNCHRONOUS']
+    busy_timeout = int(config['SQLITE_BUSY_TIMEOUT_MS'])
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if engine.url.database not in (None, '', ':memory:'):
+            cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        cursor.close()
+
+    if not config['SQLITE_SERIALIZE_WRITES']:
+        return None
+
+    writer_lock = SQLiteWriterLock(busy_timeout / 1000)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def take_writer_lock(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+            writer_lock.acquire(conn.info)
+
+    @event.listens_for(engine, 'commit')
+    def release_on_commit(conn):
+        writer_lock.release(conn.info)
+
+    @event.listens_for(engine, 'rollback')
+    def release_on_rollback(conn):
+        writer_lock.release(conn.info)
+
+    @event.listens_for(engine.pool, 'checkin')
+    def release_on_checkin(dbapi_connection, connection_record):
+        writer_lock.release(connection_record.info)
+
+    return writer_lock
+
+
+def pool_stats(db):
+    """
+    Connection pool usage per engine ('primary', 'replica', ...); saturation
+    is checked-out connections over the most the pool will hand out
+    """
+    stats = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        entry = {'url': engine.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+        if hasattr(pool, 'checkedout'):
+            limit = pool.size() + max(pool._max_overflow, 0)
+            entry.update({
+                'size': pool.size(),
+                'max_overflow': pool._max_overflow,
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'saturation': pool.checkedout() / limit if limit else 0.0
+            })
+        lock = writer_locks.get(engine.url.database) if engine.dialect.name == 'sqlite' else None
+        if lock is not None:
+            entry.update({'writer_waits': lock.waits, 'writer_timeouts': lock.timeouts,
+                          'writer_stray_releases': lock.stray_releases})
+        stats[key or 'primary'] = entry
+    return stats
+
+
+def install(app, db):
+    """
+    Apply the backend's profile to the extension's engines
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                writer_locks[engine.url.database] = install_sqlite_profile(engine, app.config)
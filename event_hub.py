@@ -0,0 +1,130 @@
+import json
+import threading
+from collections import deque
+
+
+class Subscription:
+    """
+    One open event stream: a short queue of encoded events and a flag the
+    stream waits on
+    """
+
+    __slots__ = ('user_id', 'events', 'ready')
+
+    def __init__(self, user_id, max_queued):
+        self.user_id = user_id
+        self.events = deque(maxlen=max_queued)
+        self.ready = threading.Event()
+
+
+class EventHub:
+    """
+    Fans out per-user events (timers, cooking steps) to that user's open
+    Server-Sent Events streams.
+
+    An idle stream is a Subscription blocked on its Event, so it costs no
+    CPU between heartbeats; with gevent workers it is one greenlet, not a
+    thread. Each event is encoded once and appended to the queue of every
+    stream the user has open. A stream that stops reading loses its oldest
+    events past max_queued rather than growing without bound, and a
+    reconnecting client is sent a snapshot of the current state instead
+    of a replay.
+
+    Streams are per process, so run a single (gevent) worker process or
+    route a user's requests to one process.
+    """
+
+    def __init__(self, heartbeat: float = 15, max_queued: int = 100):
+        self.heartbeat = heartbeat
+        self.max_queued = max_queued
+        self._subscriptions = {}  # user_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    def init_app(self, app):
+        """
+        Settings come from EVENT_STREAM_HEARTBEAT (seconds) and EVENT_STREAM_MAX_QUEUED
+        """
+        self.heartbeat = app.config.get('EVENT_STREAM_HEARTBEAT', self.heartbeat)
+        self.max_queued = app.config.get('EVENT_STREAM_MAX_QUEUED', self.max_queued)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_queued)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscriptions
+
+    @staticmethod
+    def encode(event, data, event_id=None):
+        frame = f'event: {event}\ndata: {json.dumps(data, default=str)}\n'
+        if event_id is not None:
+            frame = f'id: {event_id}\n' + frame
+        return frame + '\n'
+
+    def publish(self, user_id, event, data):
+        """
+        Send an event to every open stream of a user; a no-op if they have none
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+            if not subscriptions:
+                return
+            self._next_id += 1
+            frame = self.encode(event, data, self._next_id)
+            self.published += 1
+        for subscription in subscriptions:
+            if len(subscription.events) == subscription.events.maxlen:
+                self.dropped += 1
+            subscription.events.append(frame)
+            subscription.ready.set()
+
+    def stream(self, user_id, snapshot=None, tick=None):
+        """
+        Generator of Server-Sent Events text for a user: the snapshot
+        events first, then published events as they arrive. When nothing
+        arrives for a heartbeat interval, tick() supplies periodic events
+        (e.g. timer countdowns), or a comment keeps the connection open.
+        """
+        subscription = self.subscribe(user_id)
+        try:
+            yield 'retry: 5000\n\n'
+            for event, data in snapshot or ():
+                yield self.encode(event, data)
+            while True:
+                if not subscription.ready.wait(self.heartbeat):
+                    events = tick() if tick else ()
+                    yield ''.join(self.encode(event, data) for event, data in events) or ': keepalive\n\n'
+                    continue
+                subscription.ready.clear()
+                frames = []
+                while subscription.events:
+                    frames.append(subscription.events.popleft())
+                yield ''.join(frames)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._subscriptions),
+                'connections': sum(len(s) for s in self._subscriptions.values()),
+                'published': self.published,
+                'dropped': self.dropped
+            }
+
+
+# Global event hub instance
+event_hub = EventHub()
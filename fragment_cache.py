@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict, defaultdict
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from models.step_cache import recipe_version
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class FragmentCache:
+    """
+    Rendered template fragments (recipe cards, step lists), keyed by a
+    fragment name plus the objects it shows.
+
+    A model object contributes its id and updated_at to the key, so an
+    edited recipe simply stops matching its old fragments; those age out
+    least recently used first once the cached HTML passes max_bytes. Hits
+    and misses are counted per fragment name.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> html
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+
+    def init_app(self, app):
+        """
+        Register the {% cache %} tag; size limit comes from FRAGMENT_CACHE_MAX_BYTES
+        """
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    @staticmethod
+    def _key_part(value):
+        if hasattr(value, 'id') and hasattr(value, 'updated_at'):
+            return (value.id, recipe_version(value.updated_at))
+        return value
+
+    def render(self, name, parts, caller):
+        key = (name,) + tuple(self._key_part(part) for part in parts)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self._hits[name] += 1
+                return Markup(html)
+            self._misses[name] += 1
+
+        html = str(caller())
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = html
+                self._size += len(html)
+                while self._size > self.max_bytes and self._entries:
+                    _old_key, old_html = self._entries.popitem(last=False)
+                    self._size -= len(old_html)
+        return Markup(html)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._size = 0
+
+    def stats(self):
+        hits, misses = sum(self._hits.values()), sum(self._misses.values())
+        return {
+            'entries': len(self._entries),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'fragments': {
+                name: {
+                    'hits': self._hits[name],
+                    'misses': self._misses[name],
+                    'hit_rate': self._hits[name] / (self._hits[name] + self._misses[name])
+                } for name in set(self._hits) | set(self._misses)
+            }
+        }
+
+
+# Global fragment cache instance
+fragment_cache = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache 'recipe-card', recipe %}...{% endcache %} renders the body once
+    per fragment name and key objects, then serves it from fragment_cache
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', [args[0], nodes.List(args[1:])]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, name, parts, caller):
+        return fragment_cache.render(name, parts, caller)
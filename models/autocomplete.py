@@ -0,0 +1,326 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from heapq import nlargest
+from sqlalchemy import func
+from models import db
+from models.db_models import Recipe, CookingSession
+
+# Suggestions kept per busy prefix; asking for more falls back to a scan
+TOP_K = 20
+# Prefixes matching at most this many keys are ranked by scanning them
+SCAN_LIMIT = 64
+# Sorts after any character a key can hold, to find the end of a prefix's range
+_MAX_CHAR = '\U0010ffff'
+
+_QUANTITY_RE = re.compile(
+    r'^[\d\s/.,½¼¾-]*'
+    r'(?:(?:g|kg|mg|ml|l|oz|lb|lbs|cups?|tbsp|tsp|tablespoons?|teaspoons?|cloves?|slices?|inch|'
+    r'pinch of|sheets?|small|medium|large|ripe|fresh)\b\s*)*',
+    re.IGNORECASE
+)
+_TRAILING_RE = re.compile(r'\s*(?:\(.*?\)|,.*$|\bto (?:taste|serve)\b.*$|\bfor frying\b.*$)', re.IGNORECASE)
+
+
+def normalize_text(text):
+    """
+    Lowercase and collapse whitespace, for prefix keys and queries
+    """
+    return ' '.join((text or '').lower().split())
+
+
+def normalize_ingredient(line):
+    """
+    Reduce an ingredient line to its name,
+    e.g. "500g chicken breast, cubed" -> "chicken breast"
+    """
+    name = _TRAILING_RE.sub('', (line or '').strip().lstrip('•-* '))
+    name = _QUANTITY_RE.sub('', name)
+    return normalize_text(name)
+
+
+def ingredient_names(ingredients):
+    """
+    Distinct normalized ingredient names in a recipe's ingredient text
+    """
+    names = []
+    for line in (ingredients or '').split('\n'):
+        name = normalize_ingredient(line)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class AutocompleteIndex:
+    """
+    Prefix index over recipe titles and ingredient names.
+
+    Keys live in one sorted list, so a prefix's matches are one binary
+    search away. Titles are indexed from every word, so "chick" finds
+    "Butter Chicken". Suggestions are ranked by popularity, i.e. how many
+    cooking sessions were started for the recipe (or, for an ingredient, for
+    recipes using it).
+
+    A prefix matching more than SCAN_LIMIT keys keeps its TOP_K ranked
+    suggestions, built by merging the lists of its one-character-longer
+    children, so a lookup never scans more than SCAN_LIMIT keys. A started
+    session only raises scores, so it just promotes the recipe and its
+    ingredients in the lists of their own prefixes; adding, editing or
+    removing a recipe rebuilds the lists of the prefixes of its keys.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._keys = []                        # sorted (key, kind, ref)
+        self._titles = {}                      # recipe_id -> title
+        self._recipe_ingredients = {}          # recipe_id -> [ingredient name]
+        self._ingredient_recipes = defaultdict(set)
+        self._popularity = defaultdict(int)    # recipe_id -> cooking sessions
+        self._ingredient_score = defaultdict(int)
+        self._top = {}                         # busy prefix -> [(kind, ref)], best first
+
+    def ensure_loaded(self):
+        """
+        Build the index from the database on first use
+        """
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def invalidate(self):
+        """
+        Drop the index so it is rebuilt on next use (e.g. after a bulk import)
+        """
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    def _load(self):
+        popularity = db.session.query(CookingSession.recipe_id, func.count(CookingSession.id)).group_by(
+            CookingSession.recipe_id
+        )
+        for recipe_id, count in popularity:
+            self._popularity[recipe_id] = count
+
+        keys = []
+        for recipe_id, title, ingredients in db.session.query(Recipe.id, Recipe.title, Recipe.ingredients):
+            keys.extend(self._index_recipe(recipe_id, title, ingredients))
+        for name in self._ingredient_recipes:
+            keys.append((name, 'ingredient', name))
+        keys.sort()
+        self._keys = keys
+        self._rank_prefix('', 0, len(keys))
+        self._top.pop('', None)
+
+    @staticmethod
+    def _title_keys(recipe_id, title):
+        words = normalize_text(title).split()
+        return [(' '.join(words[i:]), 'recipe', recipe_id) for i in range(len(words))]
+
+    def _index_recipe(self, recipe_id, title, ingredients):
+        """
+        Record a recipe's title and ingredients; returns its title keys and
+        leaves ingredient keys to the caller, since those are shared
+        """
+        self._titles[recipe_id] = title
+        names = ingredient_names(ingredients)
+        self._recipe_ingredients[recipe_id] = names
+        popularity = self._popularity[recipe_id]
+        for name in names:
+            self._ingredient_recipes[name].add(recipe_id)
+            self._ingredient_score[name] += popularity
+        return self._title_keys(recipe_id, title)
+
+    def _remove_key(self, entry):
+        i = bisect_left(self._keys, entry)
+        if i < len(self._keys) and self._keys[i] == entry:
+            del self._keys[i]
+
+    def _rank(self, item):
+        kind, ref = item
+        if kind == 'recipe':
+            return self._popularity[ref], True, -len(self._titles[ref]), -ref
+        return self._ingredient_score[ref], False, -len(ref), ref
+
+    def _range(self, prefix):
+        return (bisect_left(self._keys, (prefix,)),
+                bisect_left(self._keys, (prefix + _MAX_CHAR,)))
+
+    def _scan(self, lo, hi, limit=TOP_K):
+        return nlargest(limit, {(kind, ref) for _key, kind, ref in self._keys[lo:hi]}, key=self._rank)
+
+    def _rank_prefix(self, prefix, lo, hi):
+        """
+        Best TOP_K items among keys[lo:hi], which all start with prefix;
+        kept in _top when the range is too long to scan
+        """
+        if hi - lo <= SCAN_LIMIT:
+            self._top.pop(prefix, None)
+            return self._scan(lo, hi)
+        depth = len(prefix)
+        candidates = set()
+        i = lo
+        while i < hi:
+            key, kind, ref = self._keys[i]
+            if len(key) == depth:
+                candidates.add((kind, ref))
+                i += 1
+                continue
+            child = key[:depth + 1]
+            j = bisect_left(self._keys, (child + _MAX_CHAR,), i, hi)
+            top = self._top.get(child)
+            candidates.update(top if top is not None else self._rank_prefix(child, i, j))
+            i = j
+        top = self._top[prefix] = nlargest(TOP_K, candidates, key=self._rank)
+        return top
+
+    def _recipe_keys(self, recipe_id):
+        """
+        Key strings of a recipe's title and ingredients, as currently indexed
+        """
+        title = self._titles.get(recipe_id)
+        keys = {key for key, _kind, _ref in self._title_keys(recipe_id, title)} if title is not None else set()
+        return keys | set(self._recipe_ingredients.get(recipe_id, []))
+
+    def _refresh(self, keys):
+        """
+        Rebuild the lists of every prefix of the given keys after they were
+        added or removed or their scores dropped; longest prefixes first, so
+        each one merges children that are already current
+        """
+        prefixes = {key[:n] for key in keys for n in range(1, len(key) + 1)}
+        for prefix in prefixes:
+            self._top.pop(prefix, None)
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            self._rank_prefix(prefix, *self._range(prefix))
+
+    def _promote(self, item, key):
+        """
+        Move an item up the lists of a key's prefixes after its score rose
+        """
+        rank = self._rank(item)
+        for n in range(1, len(key) + 1):
+            top = self._top.get(key[:n])
+            if top is None:
+                break  # longer prefixes match fewer keys, so none of them has a list either
+            if item not in top:
+                if len(top) >= TOP_K and rank <= self._rank(top[-1]):
+                    continue
+                top.append(item)
+            top.sort(key=self._rank, reverse=True)
+            del top[TOP_K:]
+
+    def _remove(self, recipe_id):
+        title = self._titles.pop(recipe_id, None)
+        if title is None:
+            return
+        for entry in self._title_keys(recipe_id, title):
+            self._remove_key(entry)
+        popularity = self._popularity[recipe_id]
+        for name in self._recipe_ingredients.pop(recipe_id, []):
+            recipes = self._ingredient_recipes[name]
+            recipes.discard(recipe_id)
+            self._ingredient_score[name] -= popularity
+            if not recipes:
+                del self._ingredient_recipes[name]
+                del self._ingredient_score[name]
+                self._remove_key((name, 'ingredient', name))
+
+    def update_recipe(self, recipe):
+        """
+        Re-index a single recipe after it was added or edited
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            changed = self._recipe_keys(recipe.id)
+            self._remove(recipe.id)
+            new_names = [name for name in ingredient_names(recipe.ingredients) if name not in self._ingredient_recipes]
+            for entry in self._index_recipe(recipe.id, recipe.title, recipe.ingredients):
+                insort(self._keys, entry)
+            for name in new_names:
+                insort(self._keys, (name, 'ingredient', name))
+            self._refresh(changed | self._recipe_keys(recipe.id))
+
+    def remove_recipe(self, recipe_id):
+        """
+        Drop a deleted recipe from the index
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            changed = self._recipe_keys(recipe_id)
+            self._remove(recipe_id)
+            self._refresh(changed)
+
+    def record_session(self, recipe_id):
+        """
+        Bump a recipe's popularity when a cooking session is started for it
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            title = self._titles.get(recipe_id)
+            if title is None:
+                return
+            self._popularity[recipe_id] += 1
+            for key, kind, ref in self._title_keys(recipe_id, title):
+                self._promote((kind, ref), key)
+            for name in self._recipe_ingredients.get(recipe_id, []):
+                self._ingredient_score[name] += 1
+                self._promote(('ingredient', name), name)
+
+    def suggest(self, prefix, limit=8):
+        """
+        Return up to `limit` suggestions for a prefix, most popular first.
+        Each suggestion is a dict with type, label and, for recipes, recipe_id.
+        """
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        self.ensure_loaded()
+
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is not None and limit <= TOP_K:
+                best = top[:limit]
+            else:
+                best = self._scan(*self._range(prefix), limit=limit)
+
+            suggestions = []
+            for kind, ref in best:
+                if kind == 'recipe':
+                    suggestions.append({'type': kind, 'label': self._titles[ref],
+                                        'popularity': self._popularity[ref], 'recipe_id': ref})
+                else:
+                    suggestions.append({'type': kind, 'label': ref, 'popularity': self._ingredient_score[ref]})
+            return suggestions
+
+    def top_recipes(self, limit=10):
+        """
+        (recipe_id, title, cooking sessions) for the most started recipes
+        """
+        self.ensure_loaded()
+        with self._lock:
+            best = nlargest(limit, ((count, recipe_id) for recipe_id, count in self._popularity.items()
+                                    if count and recipe_id in self._titles))
+            return [(recipe_id, self._titles[recipe_id], count) for count, recipe_id in best]
+
+    def recipe_ids(self, prefix, limit=20):
+        """
+        Ids of the most popular recipes whose title matches a prefix
+        """
+        return [s['recipe_id'] for s in self.suggest(prefix, limit) if s['type'] == 'recipe']
+
+
+# Global autocomplete index instance
+autocomplete_index = AutocompleteIndex()
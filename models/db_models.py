@@ -23,9 +23,23 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f'<User {self.username}>'
 
+recipe_dietary_tags = db.Table(
+    'recipe_dietary_tag',
+    db.Column('recipe_id', db.Integer, db.ForeignKey('recipe.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('dietary_tag.id'), primary_key=True),
+    db.Index('ix_recipe_dietary_tag_tag_recipe', 'tag_id', 'recipe_id')
+)
+
+class DietaryTag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False, index=True)  # normalized, e.g. "gluten-free"
+    
+    def __repr__(self):
+        return f'<DietaryTag {self.name}>'
+
 class Recipe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
+    title = db.Column(db.String(200), nullable=False, index=True)
     category = db.Column(db.String(100), nullable=False)
     ingredients = db.Column(db.Text, nullable=False)
     dietary_tags = db.Column(db.String(200))  # e.g., "vegetarian,gluten-free"
@@ -39,7 +53,15 @@ class Recipe(db.Model):
     voice_description = db.Column(db.Text)  # AI-generated description for voice
     
     # Relationships
-    steps = db.relationship('Step', backref='recipe', lazy=True, cascade='all, delete-orphan')
+    steps = db.relationship('Step', backref='recipe', lazy=True, cascade='all, delete-orphan',
+                            order_by='Step.step_number')
+    tags = db.relationship('DietaryTag', secondary=recipe_dietary_tags, lazy='selectin',
+                           order_by='DietaryTag.name', backref=db.backref('recipes', lazy='dynamic'))
+    
+    @property
+    def tag_names(self):
+        """Normalized dietary tag names, as stored in the tag table"""
+        return [tag.name for tag in self.tags]
     
     def __repr__(self):
         return f'<Recipe {self.title}>'
@@ -62,6 +84,7 @@ class CookingSession(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id'), nullable=False)
     current_step = db.Column(db.Integer, default=1)
+    total_steps = db.Column(db.Integer)  # cached step count of the recipe, bounds navigation
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
@@ -74,6 +97,13 @@ class CookingSession(db.Model):
     # Relationships
     recipe = db.relationship('Recipe', backref='cooking_sessions')
     
+    __table_args__ = (
+        # At most one active session per user; also serves the active-session lookup
+        db.Index('uq_cooking_session_active_user', 'user_id', unique=True,
+                 sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+        db.Index('ix_cooking_session_active_last_activity', 'is_active', 'last_activity'),
+    )
+    
     def __repr__(self):
         return f'<CookingSession {self.user_id} - {self.recipe_id}>'
 
@@ -96,8 +126,44 @@ class VoiceCommand(db.Model):
     command_text = db.Column(db.Text, nullable=False)
     intent_detected = db.Column(db.String(100))
     response_generated = db.Column(db.Text)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     success = db.Column(db.Boolean, default=True)
     
     def __repr__(self):
-        return f'<VoiceCommand {self.intent_detected} for User {self.user_id}>' 
\ No newline at end of file
+        return f'<VoiceCommand {self.intent_detected} for User {self.user_id}>'
+
+class VoiceCommandRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)  # hour, day
+    period_start = db.Column(db.DateTime, nullable=False)
+    intent = db.Column(db.String(100), nullable=False)
+    command_count = db.Column(db.Integer, default=0, nullable=False)
+    success_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('period', 'period_start', 'intent', name='uq_voice_command_rollup'),
+    )
+    
+    @property
+    def success_rate(self):
+        return self.success_count / self.command_count if self.command_count else 0.0
+    
+    def __repr__(self):
+        return f'<VoiceCommandRollup {self.period} {self.period_start} {self.intent}>'
+
+class UnrecognizedPhrase(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    phrase = db.Column(db.String(200), unique=True, nullable=False)  # normalized command text
+    count = db.Column(db.Integer, default=0, nullable=False, index=True)
+    last_seen = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<UnrecognizedPhrase {self.phrase!r} x{self.count}>'
+
+class RollupWatermark(db.Model):
+    name = db.Column(db.String(50), primary_key=True)  # e.g. "voice_command"
+    last_id = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.name} at {self.last_id}>' 
\ No newline at end of file
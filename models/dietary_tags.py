@@ -0,0 +1,75 @@
+import re
+from models import db
+from models.db_models import Recipe, DietaryTag
+
+
+def normalize_tag(tag):
+    """
+    Normalize a single dietary tag, e.g. " Gluten Free " -> "gluten-free"
+    """
+    if not tag:
+        return ''
+    return re.sub(r'[\s_]+', '-', tag.strip().lower()).strip('-')
+
+
+def parse_tags(raw_tags):
+    """
+    Parse a comma-separated string (or a list of such strings) into a
+    de-duplicated list of normalized tag names, keeping the given order
+    """
+    if not raw_tags:
+        return []
+    if isinstance(raw_tags, str):
+        raw_tags = [raw_tags]
+
+    names = []
+    for raw in raw_tags:
+        for part in (raw or '').split(','):
+            name = normalize_tag(part)
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    """
+    Return DietaryTag rows for the given normalized names, creating missing ones
+    """
+    if not names:
+        return []
+    existing = {tag.name: tag for tag in DietaryTag.query.filter(DietaryTag.name.in_(names)).all()}
+    tags = []
+    for name in names:
+        tag = existing.get(name)
+        if tag is None:
+            tag = DietaryTag(name=name)
+            db.session.add(tag)
+            existing[name] = tag
+        tags.append(tag)
+    return tags
+
+
+def set_recipe_tags(recipe, raw_tags):
+    """
+    Store dietary tags on a recipe: the display string and the indexed tag rows
+    """
+    names = parse_tags(raw_tags)
+    recipe.dietary_tags = ','.join(names)
+    recipe.tags = get_or_create_tags(names)
+    return names
+
+
+def sync_recipe_tags():
+    """
+    Backfill the tag table for recipes that only have the legacy comma-separated string
+    """
+    recipes = Recipe.query.filter(
+        Recipe.dietary_tags.isnot(None),
+        Recipe.dietary_tags != '',
+        ~Recipe.tags.any()
+    ).all()
+    for recipe in recipes:
+        set_recipe_tags(recipe, recipe.dietary_tags)
+    if recipes:
+        db.session.commit()
+    return len(recipes)
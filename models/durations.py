@@ -0,0 +1,185 @@
+import math
+import re
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import func, update
+from models import db
+from models.db_models import Recipe, Step
+
+# A duration found in a step: bounds in seconds (equal unless a range) and the matched text
+Duration = namedtuple('Duration', ['low', 'high', 'text'])
+
+# Longest duration worth suggesting as a timer
+MAX_TIMER_SECONDS = 24 * 3600
+
+UNITS = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9}
+TEENS = {'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+         'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19}
+TENS = {'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90}
+FRACTIONS = {'½': 0.5, '¼': 0.25, '¾': 0.75, '1/2': 0.5, '1/4': 0.25, '3/4': 0.75}
+UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1}
+
+
+def _words(names):
+    return '|'.join(sorted(names, key=len, reverse=True))
+
+
+_FRACTION = r'(?:[½¼¾]|1/2|1/4|3/4)'
+_NUMBER = (
+    rf'(?:(?:\d+(?:\.\d+)?(?:\s*{_FRACTION})?'
+    rf'|{_FRACTION}'
+    rf'|(?:{_words(TENS)})(?:[\s-](?:{_words(UNITS)}))?'
+    rf'|{_words(TEENS)}|{_words(UNITS)})(?:\s+and\s+a\s+half)?'
+    r'|half(?:\s+an?)?|a\s+quarter(?:\s+of)?(?:\s+an?)?|(?:a\s+)?couple(?:\s+of)?'
+    # a bare "a" or "an" is one of anything except seconds: "a second pan" is an ordinal
+    r'|an?(?![\s-]*sec(?:ond)?s?\b))'
+)
+_UNIT = r'(?:hours?|hrs?|minutes?|mins?|seconds?|secs?)'
+
+# One quantity and unit: "10 minutes", "9-11 mins", "between 2 and 3 hours",
+# "an hour and a half", "1 1/2 hrs", "a 10-minute rest"
+DURATION_RE = re.compile(
+    rf'(?<![\w.])(?P<between>between\s+)?(?P<low>{_NUMBER})'
+    rf'(?:\s*(?:-|–|—|to|or|(?(between)and|(?!)))\s*(?P<high>{_NUMBER}))?'
+    rf'(?:\s*|-)(?P<unit>{_UNIT})\b(?P<half>\s+and\s+a\s+half)?',
+    re.IGNORECASE
+)
+
+# What may separate the parts of a compound duration: "1 hour 30 minutes", "1 hr, and 15 min"
+_COMPOUND_GAP = re.compile(r'\s*,?\s*(?:and\s+)?', re.IGNORECASE)
+
+
+def parse_number(token):
+    """
+    Value of a number as written in a recipe: digits, "1 1/2", "½",
+    "twenty-five", "two and a half", "half an", "a couple of"
+    """
+    token = ' '.join(token.lower().replace('-', ' ').split())
+    if token.endswith(' and a half'):
+        return parse_number(token[:-len(' and a half')]) + 0.5
+    fraction = re.fullmatch(rf'(\d+(?:\.\d+)?)?\s*({_FRACTION})', token)
+    if fraction:
+        return float(fraction.group(1) or 0) + FRACTIONS[fraction.group(2)]
+    try:
+        return float(token)
+    except ValueError:
+        pass
+    if token.startswith('half'):
+        return 0.5
+    if token.startswith('a quarter'):
+        return 0.25
+    if 'couple' in token:
+        return 2
+    if token in ('a', 'an'):
+        return 1
+    return sum(UNITS.get(word) or TEENS.get(word) or TENS.get(word, 0) for word in token.split())
+
+
+def _parse(match):
+    seconds = UNIT_SECONDS[match.group('unit')[0].lower()]
+    low = parse_number(match.group('low'))
+    high = parse_number(match.group('high')) if match.group('high') else low
+    if match.group('half'):
+        low += 0.5
+        high += 0.5
+    return low * seconds, high * seconds, seconds
+
+
+def extract_durations(text):
+    """
+    Every duration mentioned in a step instruction, in order, as Duration
+    tuples. A larger unit followed by a smaller one ("1 hour 30 minutes")
+    is read as one duration.
+    """
+    durations = []
+    previous = None  # (start, end, unit seconds, was a range) of the last duration
+    for match in DURATION_RE.finditer(text or ''):
+        low, high, unit = _parse(match)
+        if low <= 0 or high < low:
+            previous = None
+            continue
+        is_range = low != high
+        start = match.start()
+        if (previous and not is_range and not previous[3] and unit < previous[2]
+                and _COMPOUND_GAP.fullmatch(text, previous[1], start)):
+            last = durations.pop()
+            low, high, start = last.low + low, last.high + high, previous[0]
+        durations.append(Duration(low, high, text[start:match.end()].strip()))
+        previous = (start, match.end(), unit, is_range)
+    return durations
+
+
+def estimate_minutes(text):
+    """
+    Time a step takes, in whole minutes: the upper end of every duration it
+    mentions, summed. None when the instruction mentions no time.
+    """
+    durations = extract_durations(text)
+    if not durations:
+        return None
+    return max(1, math.ceil(sum(d.high for d in durations) / 60))
+
+
+def _minutes(seconds):
+    minutes = round(seconds / 60, 2)
+    return int(minutes) if minutes == int(minutes) else minutes
+
+
+def suggest_timers(text):
+    """
+    Timers worth offering for a step: one per duration, set to the low end
+    of a range so the cook checks early, e.g. "Bake for 9-11 minutes" ->
+    [{'minutes': 9, 'max_minutes': 11, 'label': '9-11 minutes'}]
+    """
+    return [
+        {'minutes': _minutes(d.low), 'max_minutes': _minutes(d.high), 'label': d.text}
+        for d in extract_durations(text) if d.low <= MAX_TIMER_SECONDS
+    ]
+
+
+def step_minutes(recipe_id):
+    """
+    Total estimated_time of a recipe's steps, None when no step has one
+    """
+    return db.session.query(func.sum(Step.estimated_time)).filter_by(recipe_id=recipe_id).scalar()
+
+
+def backfill_step_times(batch_size=1000):
+    """
+    Estimate steps saved without an estimated_time and give recipes with no
+    cooking_time the total of their steps, one batch per transaction.
+    Recipes that change get a new updated_at so cached step lists and pages
+    are refreshed. Returns (steps estimated, recipes timed).
+    """
+    estimated = 0
+    touched = set()
+    last_id = 0
+    while True:
+        rows = db.session.query(Step.id, Step.recipe_id, Step.instruction).filter(
+            Step.estimated_time.is_(None), Step.id > last_id
+        ).order_by(Step.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for step_id, recipe_id, instruction in rows:
+            minutes = estimate_minutes(instruction)
+            if minutes is not None:
+                updates.append({'id': step_id, 'estimated_time': minutes})
+                touched.add(recipe_id)
+        if updates:
+            db.session.execute(update(Step), updates)
+            estimated += len(updates)
+        db.session.commit()
+
+    totals = dict(db.session.query(Step.recipe_id, func.sum(Step.estimated_time)).join(Recipe).filter(
+        Recipe.cooking_time.is_(None), Step.estimated_time.isnot(None)
+    ).group_by(Step.recipe_id).all())
+    now = datetime.utcnow()
+    stamped = [{'id': recipe_id, 'updated_at': now} for recipe_id in touched - set(totals)]
+    timed = [{'id': recipe_id, 'updated_at': now, 'cooking_time': total} for recipe_id, total in totals.items()]
+    for rows in (stamped, timed):
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(update(Recipe), rows[start:start + batch_size])
+            db.session.commit()
+    return estimated, len(totals)
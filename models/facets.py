@@ -0,0 +1,195 @@
+import threading
+from collections import defaultdict, namedtuple
+from models import db
+from models.db_models import Recipe, DietaryTag, recipe_dietary_tags
+
+# (key, label, min minutes inclusive, max minutes exclusive)
+COOKING_TIME_BUCKETS = [
+    ('under-15', 'Under 15 min', 0, 15),
+    ('15-30', '15-30 min', 15, 30),
+    ('30-60', '30-60 min', 30, 60),
+    ('over-60', 'Over 1 hour', 60, None),
+]
+
+# Facets where selecting several values widens the result (OR); dietary
+# tags narrow it instead (a recipe must carry every selected tag).
+DISJUNCTIVE_FACETS = ('category', 'difficulty', 'cooking_time')
+FACETS = DISJUNCTIVE_FACETS + ('dietary',)
+
+RecipeFacets = namedtuple('RecipeFacets', 'title category dietary difficulty cooking_time')
+
+
+def cooking_time_bucket(minutes):
+    """
+    Map a cooking time in minutes to its bucket key, or None if unknown
+    """
+    if minutes is None:
+        return None
+    for key, _label, low, high in COOKING_TIME_BUCKETS:
+        if minutes >= low and (high is None or minutes < high):
+            return key
+    return None
+
+
+class FacetIndex:
+    """
+    In-memory inverted index over recipe facets.
+
+    Each facet value keeps the set of recipe ids carrying it, so per-value
+    counts are maintained incrementally as recipes are written, and a search
+    with any combination of filters is answered with set intersections
+    instead of a GROUP BY per facet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._recipes = {}
+        self._postings = {facet: defaultdict(set) for facet in FACETS}
+
+    def ensure_loaded(self):
+        """
+        Build the index from the database on first use
+        """
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def invalidate(self):
+        """
+        Drop the index so it is rebuilt on next use (e.g. after a bulk import)
+        """
+        with self._lock:
+            self._loaded = False
+            self._recipes = {}
+            self._postings = {facet: defaultdict(set) for facet in FACETS}
+
+    def _load(self):
+        tags_by_recipe = defaultdict(list)
+        tag_rows = db.session.query(recipe_dietary_tags.c.recipe_id, DietaryTag.name).join(
+            DietaryTag, DietaryTag.id == recipe_dietary_tags.c.tag_id
+        )
+        for recipe_id, name in tag_rows:
+            tags_by_recipe[recipe_id].append(name)
+
+        rows = db.session.query(
+            Recipe.id, Recipe.title, Recipe.category, Recipe.difficulty_level, Recipe.cooking_time
+        )
+        for recipe_id, title, category, difficulty, cooking_time in rows:
+            self._add(recipe_id, RecipeFacets(
+                title=(title or '').lower(),
+                category=category,
+                dietary=frozenset(tags_by_recipe.get(recipe_id, ())),
+                difficulty=difficulty,
+                cooking_time=cooking_time_bucket(cooking_time)
+            ))
+
+    def _add(self, recipe_id, facets):
+        self._recipes[recipe_id] = facets
+        for facet in DISJUNCTIVE_FACETS:
+            value = getattr(facets, facet)
+            if value:
+                self._postings[facet][value].add(recipe_id)
+        for tag in facets.dietary:
+            self._postings['dietary'][tag].add(recipe_id)
+
+    def _remove(self, recipe_id):
+        facets = self._recipes.pop(recipe_id, None)
+        if facets is None:
+            return
+        for facet in FACETS:
+            values = facets.dietary if facet == 'dietary' else [getattr(facets, facet)]
+            postings = self._postings[facet]
+            for value in values:
+                if value in postings:
+                    postings[value].discard(recipe_id)
+                    if not postings[value]:
+                        del postings[value]
+
+    def update_recipe(self, recipe):
+        """
+        Re-index a single recipe after it was added or edited
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(recipe.id)
+            self._add(recipe.id, RecipeFacets(
+                title=(recipe.title or '').lower(),
+                category=recipe.category,
+                dietary=frozenset(recipe.tag_names),
+                difficulty=recipe.difficulty_level,
+                cooking_time=cooking_time_bucket(recipe.cooking_time)
+            ))
+
+    def remove_recipe(self, recipe_id):
+        """
+        Drop a deleted recipe from the index
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(recipe_id)
+
+    def counts(self, facet):
+        """
+        Unfiltered count per value of a facet
+        """
+        self.ensure_loaded()
+        with self._lock:
+            return {value: len(ids) for value, ids in self._postings[facet].items()}
+
+    def search(self, query='', filters=None):
+        """
+        Return (sorted matching recipe ids, facet counts) for a title query and
+        a dict of facet -> selected values.
+
+        Counts for an OR facet ignore that facet's own selection, so they show
+        how many results picking another value would give; dietary counts are
+        taken over the current results, since tags are combined with AND.
+        """
+        self.ensure_loaded()
+        filters = {facet: set(values) for facet, values in (filters or {}).items()
+                   if facet in FACETS and values}
+        query = (query or '').lower()
+
+        with self._lock:
+            base = set(self._recipes)
+            if query:
+                base = {recipe_id for recipe_id in base if query in self._recipes[recipe_id].title}
+
+            matches = {}
+            for facet, values in filters.items():
+                postings = self._postings[facet]
+                if facet == 'dietary':
+                    ids = None
+                    for value in values:
+                        ids = set(postings.get(value, ())) if ids is None else ids & postings.get(value, set())
+                    matches[facet] = ids or set()
+                else:
+                    matches[facet] = set().union(*(postings.get(value, ()) for value in values))
+
+            results = base.intersection(*matches.values()) if matches else base
+
+            facet_counts = {}
+            for facet in FACETS:
+                if facet in DISJUNCTIVE_FACETS:
+                    others = [ids for other, ids in matches.items() if other != facet]
+                    scope = base.intersection(*others) if others else base
+                else:
+                    scope = results
+                facet_counts[facet] = {
+                    value: count for value, count in
+                    ((value, len(ids & scope)) for value, ids in self._postings[facet].items())
+                    if count
+                }
+
+        return sorted(results), facet_counts
+
+
+# Global facet index instance
+facet_index = FacetIndex()
@@ -0,0 +1,253 @@
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import insert, update, delete, select
+from models import db
+from models.db_models import Recipe, Step, DietaryTag, recipe_dietary_tags
+from models.dietary_tags import parse_tags
+from models.durations import estimate_minutes
+
+SAMPLE_RECIPES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'sample_recipes.json')
+
+# Kept under SQLite's default limit on bound parameters for the title lookup
+DEFAULT_CHUNK_SIZE = 500
+
+RECIPE_FIELDS = ('category', 'ingredients', 'cooking_time', 'difficulty_level', 'voice_description')
+
+
+def iter_ndjson(lines):
+    """
+    Yield one record per non-empty line of an NDJSON stream
+    """
+    for line_number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+
+
+def read_recipe_file(path):
+    """
+    Yield recipe records from a JSON array file or an NDJSON file
+    """
+    with open(path, encoding='utf-8') as f:
+        first = ''
+        while not first:
+            char = f.read(1)
+            if not char:
+                return
+            if not char.isspace():
+                first = char
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+        else:
+            yield from iter_ndjson(f)
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _step_rows(steps):
+    """
+    Step rows of a record, without recipe_id; an estimated_time missing from
+    the record is read from the instruction
+    """
+    rows = []
+    for step in steps or []:
+        if isinstance(step, str):
+            step = {'instruction': step}
+        instruction = (step.get('instruction') or '').strip()
+        if not instruction:
+            continue
+        estimated_time = step.get('estimated_time')
+        rows.append({
+            'step_number': len(rows) + 1,
+            'instruction': instruction,
+            'estimated_time': estimate_minutes(instruction) if estimated_time is None else estimated_time,
+            'voice_instruction': step.get('voice_instruction')
+        })
+    return rows
+
+
+def _total_minutes(step_rows):
+    times = [row['estimated_time'] for row in step_rows if row['estimated_time'] is not None]
+    return sum(times) if times else None
+
+
+def _tag_ids(names):
+    """
+    Map tag names to ids, inserting any missing tags in one statement
+    """
+    if not names:
+        return {}
+    ids = dict(db.session.query(DietaryTag.name, DietaryTag.id).filter(DietaryTag.name.in_(names)).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        db.session.execute(insert(DietaryTag), [{'name': name} for name in missing])
+        ids.update(db.session.query(DietaryTag.name, DietaryTag.id).filter(DietaryTag.name.in_(missing)).all())
+    return ids
+
+
+def _load_chunk(chunk, owner_id):
+    # Last record wins when a title repeats within the chunk
+    by_title = {}
+    for record in chunk:
+        title = (record.get('title') or '').strip()
+        if title:
+            by_title[title] = record
+
+    existing = dict(db.session.query(Recipe.title, Recipe.id).filter(Recipe.title.in_(list(by_title))).all())
+    now = datetime.utcnow()
+
+    new_rows = []
+    updates = []
+    steps_by_title = {}
+    for title, record in by_title.items():
+        tags = parse_tags(record.get('dietary_tags'))
+        steps = steps_by_title[title] = _step_rows(record.get('steps'))
+        row = {field: record.get(field) for field in RECIPE_FIELDS}
+        row.update(title=title, dietary_tags=','.join(tags), updated_at=now)
+        if row['cooking_time'] is None:
+            row['cooking_time'] = _total_minutes(steps)
+        if title in existing:
+            row['id'] = existing[title]
+            updates.append(row)
+        else:
+            row.update(user_id=record.get('user_id') or owner_id, created_at=now)
+            new_rows.append(row)
+
+    ids = dict(existing)
+    if new_rows:
+        result = db.session.execute(
+            Recipe.__table__.insert().returning(Recipe.title, Recipe.id, sort_by_parameter_order=True),
+            new_rows
+        )
+        ids.update((title, recipe_id) for title, recipe_id in result)
+    if updates:
+        db.session.execute(update(Recipe), updates)
+        updated_ids = [row['id'] for row in updates]
+        db.session.execute(delete(Step).where(Step.recipe_id.in_(updated_ids)))
+        db.session.execute(delete(recipe_dietary_tags).where(recipe_dietary_tags.c.recipe_id.in_(updated_ids)))
+
+    step_rows = []
+    tag_links = []
+    all_tags = {name for record in by_title.values() for name in parse_tags(record.get('dietary_tags'))}
+    tag_ids = _tag_ids(sorted(all_tags))
+    for title, record in by_title.items():
+        recipe_id = ids[title]
+        for step in steps_by_title[title]:
+            step['recipe_id'] = recipe_id
+        step_rows.extend(steps_by_title[title])
+        tag_links.extend({'recipe_id': recipe_id, 'tag_id': tag_ids[name]}
+                         for name in parse_tags(record.get('dietary_tags')))
+    if step_rows:
+        db.session.execute(Step.__table__.insert(), step_rows)
+    if tag_links:
+        db.session.execute(recipe_dietary_tags.insert(), tag_links)
+
+    return len(new_rows), len(updates), len(step_rows)
+
+
+def iter_load_recipes(records, owner_id, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Bulk load recipe records (dicts with title, category, ingredients,
+    dietary_tags, steps, ...) in chunked transactions, yielding the running
+    totals after each committed chunk.
+
+    Recipes are upserted on title: an existing recipe gets its fields,
+    steps and tags replaced, so loading the same file twice is harmless.
+    Records are consumed lazily, so a stream is never held in memory.
+    """
+    totals = {'inserted': 0, 'updated': 0, 'steps': 0}
+    for chunk in _chunks(records, chunk_size):
+        try:
+            inserted, updated, steps = _load_chunk(chunk, owner_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        totals['inserted'] += inserted
+        totals['updated'] += updated
+        totals['steps'] += steps
+        yield dict(totals)
+
+
+def load_recipes(records, owner_id, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Bulk load recipe records and return the totals; `progress`, if given,
+    is called with the running totals after each committed chunk
+    """
+    totals = {'inserted': 0, 'updated': 0, 'steps': 0}
+    for totals in iter_load_recipes(records, owner_id, chunk_size):
+        if progress:
+            progress(totals)
+    return totals
+
+
+def export_recipes(batch_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield every recipe with its steps as a dict in the loader's format.
+
+    Recipes are read through a streamed cursor in id order and their steps
+    fetched one batch at a time, so memory use does not grow with the
+    catalog.
+    """
+    columns = (Recipe.id, Recipe.title) + tuple(getattr(Recipe, field) for field in RECIPE_FIELDS) + (Recipe.dietary_tags,)
+    result = db.session.execute(
+        select(*columns).order_by(Recipe.id).execution_options(yield_per=batch_size)
+    )
+    for batch in result.partitions():
+        steps_by_recipe = defaultdict(list)
+        step_rows = db.session.execute(
+            select(Step.recipe_id, Step.instruction, Step.estimated_time, Step.voice_instruction)
+            .where(Step.recipe_id.in_([row.id for row in batch]))
+            .order_by(Step.recipe_id, Step.step_number)
+        )
+        for recipe_id, instruction, estimated_time, voice_instruction in step_rows:
+            step = {'instruction': instruction}
+            if estimated_time is not None:
+                step['estimated_time'] = estimated_time
+            if voice_instruction:
+                step['voice_instruction'] = voice_instruction
+            steps_by_recipe[recipe_id].append(step)
+
+        for row in batch:
+            record = {'title': row.title}
+            record.update((field, getattr(row, field)) for field in RECIPE_FIELDS)
+            record['dietary_tags'] = row.dietary_tags or ''
+            record['steps'] = steps_by_recipe.get(row.id, [])
+            yield record
+
+
+def synthetic_recipes(count, start=1):
+    """
+    Generate synthetic recipe records for benchmarks and staging databases
+    """
+    categories = ['Breakfast', 'Main Course', 'Dessert', 'Salad', 'Soup', 'Snack']
+    tag_sets = ['vegetarian', 'vegan,gluten-free', 'non-vegetarian', 'vegetarian,contains-dairy', 'gluten-free', '']
+    difficulties = ['easy', 'medium', 'hard']
+    for n in range(start, start + count):
+        yield {
+            'title': f'Synthetic Recipe {n}',
+            'category': categories[n % len(categories)],
+            'ingredients': f'{n % 5 + 1} cups flour\n{n % 3 + 1} eggs\nSalt to taste',
+            'dietary_tags': tag_sets[n % len(tag_sets)],
+            'difficulty_level': difficulties[n % len(difficulties)],
+            'cooking_time': 5 + n % 90,
+            'steps': [f'Step {i} of synthetic recipe {n}: stir for {i} minutes.' for i in range(1, n % 6 + 3)]
+        }
@@ -0,0 +1,43 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from models import db
+
+# Columns added to existing tables since they were first created: table -> {column: SQL type}
+ADDED_COLUMNS = {
+    'cooking_session': {'total_steps': 'INTEGER'},
+}
+
+
+def add_missing_columns():
+    """
+    Add columns declared since a table was created; create_all() only
+    creates missing tables, so a database made by an older version would
+    otherwise fail every query on them. Safe to run on every start.
+    Returns the names of the columns added.
+    """
+    inspector = inspect(db.engine)
+    added = []
+    for table, columns in ADDED_COLUMNS.items():
+        if not inspector.has_table(table):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, sql_type in columns.items():
+            if name not in existing:
+                db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}'))
+                added.append(f'{table}.{name}')
+    db.session.commit()
+    return added
+
+
+def create_missing_indexes():
+    """
+    Create declared indexes that a database made by an older version lacks,
+    such as the one-active-session-per-user index; create_all() only builds
+    indexes along with new tables. Uses CREATE INDEX IF NOT EXISTS, so it
+    is safe to run on every start. Duplicate active sessions must be closed
+    first, or the unique index cannot be built.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+    db.session.commit()
@@ -0,0 +1,140 @@
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from models import db
+from models.db_models import Recipe, Step
+from models.durations import suggest_timers
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Read-only view of a step; templates and voice handlers use the same attribute names as Step,
+# plus the timers suggested by the durations in its instruction
+CachedStep = namedtuple('CachedStep', ['step_number', 'instruction', 'voice_instruction', 'estimated_time',
+                                       'suggested_timers'])
+
+
+def recipe_version(updated_at):
+    """
+    Cache version for a recipe's updated_at; a string so it also survives JSON
+    """
+    return updated_at.isoformat() if updated_at else ''
+
+
+class StepListCache:
+    """
+    Recipe step lists keyed by (recipe_id, updated_at).
+
+    A recipe's steps are loaded once per version as a tuple of CachedStep
+    and shared by every reader; their suggested timers are parsed at load
+    time too, so requests never parse instructions. Editing a recipe bumps updated_at, so readers
+    holding the new version never see the old list even before the old
+    entry is evicted. Entries are evicted least recently used first once
+    their estimated total size passes max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (recipe_id, version) -> (steps, size)
+        self._latest = {}              # recipe_id -> cached version
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Size limit comes from STEP_CACHE_MAX_BYTES
+        """
+        self.max_bytes = app.config.get('STEP_CACHE_MAX_BYTES', self.max_bytes)
+
+    @staticmethod
+    def _estimate_size(steps):
+        size = sys.getsizeof(steps)
+        for step in steps:
+            size += sys.getsizeof(step) + sys.getsizeof(step.instruction) + sys.getsizeof(step.voice_instruction)
+            size += sum(sys.getsizeof(timer) + sys.getsizeof(timer['label']) for timer in step.suggested_timers)
+        return size
+
+    def get(self, recipe_id, version):
+        """
+        Steps of a recipe at a version (see recipe_version), loading them on a miss
+        """
+        key = (recipe_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        rows = db.session.query(Step.step_number, Step.instruction, Step.voice_instruction, Step.estimated_time).filter_by(
+            recipe_id=recipe_id
+        ).order_by(Step.step_number).all()
+        steps = tuple(CachedStep(*row, suggested_timers=tuple(suggest_timers(row.instruction))) for row in rows)
+        size = self._estimate_size(steps)
+
+        with self._lock:
+            if key not in self._entries:
+                old_version = self._latest.get(recipe_id)
+                if old_version is not None and old_version != version:
+                    self._discard((recipe_id, old_version))
+                self._entries[key] = (steps, size)
+                self._latest[recipe_id] = version
+                self._size += size
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    self._discard(next(iter(self._entries)))
+        return steps
+
+    def for_recipe(self, recipe):
+        """
+        Steps of a loaded Recipe
+        """
+        return self.get(recipe.id, recipe_version(recipe.updated_at))
+
+    def for_recipe_id(self, recipe_id):
+        """
+        Steps of a recipe by id; costs a primary key lookup for its version
+        """
+        updated_at = db.session.query(Recipe.updated_at).filter_by(id=recipe_id).scalar()
+        return self.get(recipe_id, recipe_version(updated_at))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+            if self._latest.get(key[0]) == key[1]:
+                del self._latest[key[0]]
+
+    def invalidate(self, recipe_id):
+        """
+        Drop a recipe's cached steps after it was edited or deleted
+        """
+        with self._lock:
+            version = self._latest.get(recipe_id)
+            if version is not None:
+                self._discard((recipe_id, version))
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._latest = {}
+            self._size = 0
+
+    def stats(self):
+        """
+        Entry count, estimated size and hit rate
+        """
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+# Global step list cache instance
+step_cache = StepListCache()
@@ -0,0 +1,75 @@
+from difflib import SequenceMatcher
+from models import db
+from models.db_models import Step
+
+
+def _key(text):
+    return ' '.join((text or '').split())
+
+
+def diff_steps(existing_steps, submitted_texts):
+    """
+    Match submitted step texts against existing Step rows.
+
+    Returns a list of (step, new_number, new_text) operations where:
+      - step is None              -> insert a new step
+      - new_text is None          -> delete the step
+      - otherwise                 -> keep or rewrite the step (maybe renumbered)
+
+    Steps are matched by content first, so reordering or inserting a step
+    does not touch the rows around it; leftover rows in a replaced block are
+    reused positionally before anything is deleted or inserted.
+    """
+    old_keys = [_key(step.instruction) for step in existing_steps]
+    new_keys = [_key(text) for text in submitted_texts]
+
+    operations = []
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old_block = existing_steps[i1:i2]
+        new_block = list(range(j1, j2))
+        if tag == 'equal':
+            for step, j in zip(old_block, new_block):
+                operations.append((step, j + 1, submitted_texts[j]))
+            continue
+        paired = min(len(old_block), len(new_block))
+        for step, j in zip(old_block[:paired], new_block[:paired]):
+            operations.append((step, j + 1, submitted_texts[j]))
+        for step in old_block[paired:]:
+            operations.append((step, None, None))
+        for j in new_block[paired:]:
+            operations.append((None, j + 1, submitted_texts[j]))
+    return operations
+
+
+def apply_step_diff(recipe, submitted_texts):
+    """
+    Bring a recipe's steps in line with the submitted texts using the
+    fewest inserts, updates and deletes. Unchanged steps keep their id and
+    derived data (voice_instruction, estimated_time); changed steps have it
+    cleared so it can be regenerated.
+
+    Returns the list of new or changed Step objects.
+    """
+    texts = [text.strip() for text in submitted_texts if text.strip()]
+    existing = Step.query.filter_by(recipe_id=recipe.id).order_by(Step.step_number).all()
+
+    changed = []
+    for step, number, text in diff_steps(existing, texts):
+        if step is None:
+            step = Step(recipe_id=recipe.id, step_number=number, instruction=text)
+            db.session.add(step)
+            changed.append(step)
+        elif text is None:
+            db.session.delete(step)
+        else:
+            if step.step_number != number:
+                step.step_number = number
+            if step.instruction != text:
+                content_changed = _key(step.instruction) != _key(text)
+                step.instruction = text
+                if content_changed:
+                    step.voice_instruction = None
+                    step.estimated_time = None
+                    changed.append(step)
+    return changed
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.db_models import User
+
+USER_FIELDS = ('id', 'username', 'email', 'is_admin', 'voice_enabled', 'dietary_preferences', 'voice_speed')
+
+
+class CachedUser(UserMixin):
+    """
+    Detached, read-only copy of the User fields requests need; what
+    Flask-Login hands out as current_user
+    """
+
+    __slots__ = USER_FIELDS
+
+    def __init__(self, user):
+        for field in USER_FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CachedUser is read-only; load the User to change it')
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+class UserCache:
+    """
+    Short-lived cache of CachedUser by id for Flask-Login's user loader.
+
+    Entries expire after the TTL and the least recently used are evicted
+    past max_size. Any committed change to a User drops its entry, so role
+    and preference changes apply on the next request in this process; other
+    processes pick them up within the TTL.
+    """
+
+    def __init__(self, ttl: float = 60, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (CachedUser, expires_at)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Settings come from USER_CACHE_TTL (seconds) and USER_CACHE_SIZE
+        """
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('USER_CACHE_SIZE', self.max_size)
+
+    def get(self, user_id: int):
+        """
+        The cached view of a user, loading it on a miss; None if there is no such user
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        with self._lock:
+            self._entries[user_id] = (cached, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+
+
+# Global user cache instance
+user_cache = UserCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
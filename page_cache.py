@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from flask import g, make_response, request, session
+from flask_login import current_user
+
+
+class PageCache:
+    """
+    Rendered pages for anonymous visitors, plus conditional GET for everyone.
+
+    Pages are stored by endpoint, view arguments and query string. A page
+    tied to one recipe (view argument recipe_id) is dropped when that recipe
+    changes; every other page is dropped on any recipe change, since
+    listings and search results may include it. Entries also expire after
+    the TTL, which bounds how long other worker processes (that did not see
+    the write) serve an old page, and the least recently used are evicted
+    past max_entries. A cache hit does not touch the database.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (body, mimetype, etag, last_modified, expires_at)
+        self._lock = threading.Lock()
+        self.catalog_modified = datetime.utcnow().replace(microsecond=0)
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Settings come from PAGE_CACHE_TTL (seconds) and PAGE_CACHE_SIZE
+        """
+        self.ttl = app.config.get('PAGE_CACHE_TTL', self.ttl)
+        self.max_entries = app.config.get('PAGE_CACHE_SIZE', self.max_entries)
+
+    @staticmethod
+    def cacheable():
+        # Pages show the signed-in user and any flashed messages, so only plain anonymous views are shared
+        return request.method == 'GET' and not current_user.is_authenticated and '_flashes' not in session
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[4] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype, etag, last_modified):
+        entry = (body, mimetype, etag, last_modified, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def recipe_changed(self, recipe_id):
+        """
+        Drop that recipe's page and every page not tied to a single recipe
+        """
+        with self._lock:
+            self.catalog_modified = datetime.utcnow().replace(microsecond=0)
+            for key in [k for k in self._entries if dict(k[1]).get('recipe_id', recipe_id) == recipe_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.catalog_modified = datetime.utcnow().replace(microsecond=0)
+            self._entries = OrderedDict()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+# Global page cache instance
+page_cache = PageCache()
+
+
+def set_last_modified(when):
+    """
+    Let a cached_page view report when its content last changed (defaults
+    to the last catalog change)
+    """
+    if when is not None:
+        g.page_last_modified = when.replace(microsecond=0)
+
+
+def _conditional(response, etag, last_modified, shared):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True  # always revalidate; a matching ETag costs a 304
+    if shared:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+
+def cached_page(view):
+    """
+    Serve a GET view through the page cache with a strong ETag and
+    Last-Modified, answering If-None-Match / If-Modified-Since with 304
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        shared = page_cache.cacheable()
+        key = (request.endpoint, tuple(sorted((request.view_args or {}).items())), request.query_string)
+        entry = page_cache.get(key) if shared else None
+
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            last_modified = g.get('page_last_modified') or page_cache.catalog_modified
+            if not (shared and page_cache.cacheable()):
+                # Not shareable (or the view flashed something); still answer conditionally
+                return _conditional(response, etag, last_modified, shared=False)
+            entry = page_cache.put(key, body, response.mimetype, etag, last_modified)
+
+        body, mimetype, etag, last_modified, _expires = entry
+        response = make_response(body)
+        response.mimetype = mimetype
+        return _conditional(response, etag, last_modified, shared=True)
+
+    return wrapper
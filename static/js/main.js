@@ -16,6 +16,59 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Voice-only mode caches the user's recipe for offline use; its service worker
+    // cannot see /logout (outside its scope), so clear the cache before leaving
+    document.querySelectorAll('a[data-logout]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            if (!('caches' in window)) return;
+            e.preventDefault();
+            caches.keys()
+                .then(keys => Promise.all(keys.filter(key => key.startsWith('kitchenbuddy-')).map(key => caches.delete(key))))
+                .catch(() => {})
+                .then(() => { window.location.href = this.href; });
+        });
+    });
+
+    // Search suggestions from the autocomplete endpoint
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(input => {
+        const datalist = document.getElementById(input.getAttribute('list'));
+        let controller = null;
+        input.addEventListener('input', function() {
+            const prefix = this.value.trim();
+            if (controller) controller.abort();
+            if (!prefix || !datalist) return;
+            controller = new AbortController();
+            fetch(`${this.dataset.autocompleteUrl}?q=${encodeURIComponent(prefix)}`, { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => {
+                    datalist.innerHTML = '';
+                    data.suggestions.forEach(suggestion => {
+                        const option = document.createElement('option');
+                        option.value = suggestion.label;
+                        datalist.appendChild(option);
+                    });
+                })
+                .catch(() => {});
+        });
+    });
+
+    // Timer and cooking step events for the signed-in user, shared by the page scripts
+    const eventStreamUrl = document.body.dataset.eventStream;
+    if (eventStreamUrl && window.EventSource) {
+        window.kitchenEvents = new EventSource(eventStreamUrl);
+
+        // Follow step changes made on another device
+        const stepPage = window.location.pathname.match(/^\/recipe\/(\d+)\/step\/(\d+)/);
+        if (stepPage) {
+            window.kitchenEvents.addEventListener('step', event => {
+                const data = JSON.parse(event.data);
+                if (data.recipe_id === parseInt(stepPage[1]) && data.current_step !== parseInt(stepPage[2])) {
+                    window.location.assign(`/recipe/${data.recipe_id}/step/${data.current_step}`);
+                }
+            });
+        }
+    }
+
     // Auto-hide alerts after 5 seconds
     setTimeout(() => {
         document.querySelectorAll('.alert').forEach(alert => {
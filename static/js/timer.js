@@ -4,6 +4,8 @@ class CookingTimer {
         this.timer = null;
         this.endTime = null;
         this.isRunning = false;
+        this.serverTimers = {};
+        this.serverTimerId = null;
     }
 
     startTimer(minutes) {
@@ -57,6 +59,35 @@ class CookingTimer {
             (seconds < 10 ? '0' : '') + seconds;
     }
 
+    followServerTimers(event, timer) {
+        // Count down the server timer that ends soonest, from its remaining_seconds so the clocks needn't agree
+        const received = Date.now();
+        if (event === 'timers') {
+            this.serverTimers = {};
+            timer.timers.forEach(t => { this.serverTimers[t.id] = { ...t, received: received }; });
+        } else if (event === 'timer.started' || event === 'timer.extended' || event === 'timer.tick') {
+            this.serverTimers[timer.id] = { ...timer, received: received };
+        } else {
+            delete this.serverTimers[timer.id];
+            if (timer.id === this.serverTimerId) {
+                const finished = event === 'timer.expired' && this.isRunning;
+                this.serverTimerId = null;
+                this.stopTimer();
+                if (finished) {
+                    this.showTimerComplete();
+                }
+            }
+        }
+
+        const timers = Object.values(this.serverTimers);
+        if (timers.length === 0) {
+            return;
+        }
+        const next = timers.reduce((a, b) => (a.ends_at <= b.ends_at ? a : b));
+        this.serverTimerId = next.id;
+        this.startTimer(Math.max(0, next.remaining_seconds - (received - next.received) / 1000) / 60);
+    }
+
     showTimerComplete() {
         const timerContainer = document.getElementById('timerContainer');
         if (timerContainer) {
@@ -92,11 +123,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const timerButtons = document.querySelectorAll('.timer-btn');
     timerButtons.forEach(btn => {
         btn.addEventListener('click', function() {
-            const minutes = parseInt(this.dataset.minutes);
+            const minutes = parseFloat(this.dataset.minutes);
             timer.startTimer(minutes);
         });
     });
     
+    // Timers started on the server (by voice or on another device)
+    if (window.kitchenEvents) {
+        ['timers', 'timer.started', 'timer.extended', 'timer.tick', 'timer.expired', 'timer.cancelled'].forEach(name => {
+            window.kitchenEvents.addEventListener(name, event => {
+                timer.followServerTimers(name, JSON.parse(event.data));
+            });
+        });
+    }
+    
     // Stop timer button
     const stopTimerBtn = document.getElementById('stopTimerBtn');
     if (stopTimerBtn) {
@@ -6,9 +6,17 @@ class VoiceOnlyInterface {
         this.synthesis = window.speechSynthesis;
         this.activeTimer = null;
         this.timerInterval = null;
+        this.bundle = null;
+        this.currentStep = null;
+        this.pendingStep = null;
+        this.lastSyncedStep = null;
+        this.syncTimer = null;
+        this.audio = null;
         
         this.initializeSpeechRecognition();
         this.bindEvents();
+        this.registerServiceWorker();
+        this.loadBundle();
         this.updateVoiceFeedback("Voice-only mode ready. Click the microphone button or say 'start cooking' to begin.");
     }
 
@@ -64,7 +72,7 @@ class VoiceOnlyInterface {
         // Timer buttons
         document.querySelectorAll('.timer-btn').forEach(btn => {
             btn.addEventListener('click', (e) => {
-                const minutes = parseInt(e.target.dataset.minutes);
+                const minutes = parseFloat(e.target.dataset.minutes);
                 this.setTimer(minutes);
             });
         });
@@ -150,7 +158,235 @@ class VoiceOnlyInterface {
         }
     }
 
+    async loadBundle() {
+        // Fetch the whole recipe once so step navigation needs no round trip
+        const session = document.getElementById('cookingSession');
+        if (!session) {
+            return;
+        }
+
+        this.currentStep = parseInt(session.dataset.currentStep);
+        try {
+            const response = await fetch(session.dataset.bundleUrl);
+            if (response.ok) {
+                this.bundle = await response.json();
+                this.showSuggestedTimers(this.bundle.steps.find(s => s.step_number === this.currentStep));
+                this.cacheForOffline(session.dataset.bundleUrl);
+                this.followStepEvents();
+            }
+        } catch (error) {
+            console.error('Error loading recipe bundle:', error);
+        }
+
+        window.addEventListener('pagehide', () => this.flushProgress());
+    }
+
+    followStepEvents() {
+        // Steps changed on another device; our own progress updates come back too and are skipped
+        if (!window.kitchenEvents) {
+            return;
+        }
+
+        window.kitchenEvents.addEventListener('step', event => {
+            const data = JSON.parse(event.data);
+            if (data.recipe_id === this.bundle.id && data.current_step !== this.currentStep
+                    && data.current_step !== this.lastSyncedStep && this.pendingStep === null) {
+                this.showStep(data.current_step, false);
+            }
+        });
+        window.kitchenEvents.addEventListener('session', event => {
+            const data = JSON.parse(event.data);
+            if (!data.active || data.recipe_id !== this.bundle.id) {
+                window.location.reload();
+            }
+        });
+    }
+
+    registerServiceWorker() {
+        // Serves this page, the recipe and its audio from cache when the network drops
+        if (!('serviceWorker' in navigator)) {
+            return;
+        }
+
+        navigator.serviceWorker.register('/voice_sw.js', { scope: '/voice_only' }).catch(error => {
+            console.error('Service worker registration failed:', error);
+        });
+        const user = document.body.dataset.userId;
+        window.addEventListener('online', () => this.postToServiceWorker({ type: 'replay-progress', user: user }));
+        this.postToServiceWorker({ type: 'replay-progress', user: user });
+    }
+
+    cacheForOffline(bundleUrl) {
+        const urls = [window.location.pathname, bundleUrl];
+        this.bundle.steps.forEach(step => {
+            if (step.audio_url) {
+                urls.push(step.audio_url);
+            }
+        });
+        document.querySelectorAll('script[src], link[rel="stylesheet"]').forEach(el => {
+            urls.push(el.src || el.href);
+        });
+        this.postToServiceWorker({ type: 'cache-urls', user: document.body.dataset.userId, urls: urls });
+    }
+
+    postToServiceWorker(message) {
+        if ('serviceWorker' in navigator) {
+            navigator.serviceWorker.ready.then(registration => {
+                if (registration.active) {
+                    registration.active.postMessage(message);
+                }
+            });
+        }
+    }
+
+    navigateLocally(action) {
+        let step = this.currentStep;
+        switch (action) {
+            case 'next':
+                if (step >= this.bundle.total_steps) {
+                    this.announce('You are already at the last step of this recipe.');
+                    return true;
+                }
+                step++;
+                break;
+            case 'prev':
+                if (step <= 1) {
+                    this.announce('You are already at the first step of this recipe.');
+                    return true;
+                }
+                step--;
+                break;
+            case 'repeat':
+                break;
+            case 'ingredients':
+                this.announce(`Ingredients for ${this.bundle.title}: ${this.bundle.ingredients}`);
+                return true;
+            default:
+                return false;
+        }
+
+        this.showStep(step);
+        return true;
+    }
+
+    showStep(number, sync = true) {
+        const step = this.bundle.steps.find(s => s.step_number === number);
+        if (!step) {
+            return;
+        }
+
+        const total = this.bundle.total_steps;
+        const stepNumber = document.getElementById('currentStepNumber');
+        const stepText = document.getElementById('currentStepText');
+        const progress = document.getElementById('stepProgress');
+        if (stepNumber) {
+            stepNumber.textContent = number;
+        }
+        if (stepText) {
+            stepText.textContent = step.instruction;
+        }
+        if (progress) {
+            progress.style.width = `${(number / total) * 100}%`;
+            progress.textContent = `Step ${number} of ${total}`;
+        }
+        document.querySelectorAll('.step-card').forEach(card => {
+            const current = parseInt(card.dataset.step) === number;
+            card.classList.toggle('border-primary', current);
+            card.classList.toggle('bg-primary', current);
+            card.classList.toggle('bg-opacity-10', current);
+            const label = card.querySelector('.current-step-label');
+            if (label) {
+                label.classList.toggle('d-none', !current);
+            }
+        });
+
+        this.showSuggestedTimers(step);
+        this.updateVoiceFeedback(step.voice_text);
+        this.playStep(step);
+
+        if (number !== this.currentStep) {
+            this.currentStep = number;
+            if (sync) {
+                this.scheduleProgressSync(number);
+            }
+        }
+    }
+
+    showSuggestedTimers(step) {
+        // Timers for the durations the step mentions, e.g. "9-11 minutes"
+        const container = document.getElementById('suggestedTimers');
+        if (!container) {
+            return;
+        }
+        const timers = (step && step.suggested_timers) || [];
+        container.replaceChildren(...timers.map(timer => {
+            const button = document.createElement('button');
+            button.className = 'btn btn-success btn-sm w-100 mb-2';
+            button.textContent = `${timer.label} (this step)`;
+            button.addEventListener('click', () => this.setTimer(timer.minutes));
+            return button;
+        }));
+        container.classList.toggle('d-none', timers.length === 0);
+    }
+
+    playStep(step) {
+        if (this.audio) {
+            this.audio.pause();
+        }
+        if (!step.audio_url) {
+            this.speak(step.voice_text);
+            return;
+        }
+
+        if (this.synthesis) {
+            this.synthesis.cancel();
+        }
+        this.audio = new Audio(step.audio_url);
+        this.audio.play().catch(() => this.speak(step.voice_text));
+    }
+
+    scheduleProgressSync(number) {
+        // Steps moved through quickly are sent as one update
+        this.pendingStep = number;
+        clearTimeout(this.syncTimer);
+        this.syncTimer = setTimeout(() => this.flushProgress(), 1000);
+    }
+
+    flushProgress() {
+        clearTimeout(this.syncTimer);
+        this.syncTimer = null;
+        if (this.pendingStep === null || !this.bundle) {
+            return;
+        }
+
+        // The user lets the service worker replay a queued update only for whoever queued it
+        const body = JSON.stringify({ recipe_id: this.bundle.id, step: this.pendingStep, user: document.body.dataset.userId });
+        this.lastSyncedStep = this.pendingStep;
+        this.pendingStep = null;
+        fetch(this.bundle.progress_url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: body,
+            keepalive: true
+        }).catch(error => console.error('Error syncing progress:', error));
+    }
+
+    announce(message) {
+        this.updateVoiceFeedback(message);
+        this.speak(message);
+    }
+
     async executeAction(action) {
+        if (this.bundle && this.navigateLocally(action)) {
+            return;
+        }
+
+        if (action === 'stop') {
+            this.flushProgress();
+        }
+
         let response = '';
         switch (action) {
             case 'next':
@@ -245,7 +481,7 @@ class VoiceOnlyInterface {
             this.stopTimer();
         }
 
-        const seconds = minutes * 60;
+        const seconds = Math.round(minutes * 60);
         this.activeTimer = seconds;
         
         // Show timer card
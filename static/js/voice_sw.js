@@ -0,0 +1,192 @@
+// Voice-Only Mode service worker: keeps the active recipe usable offline
+// One cache per signed-in user, named CACHE_PREFIX + user id; only the current user's is kept
+const CACHE_PREFIX = 'kitchenbuddy-voice-v1:';
+// Progress updates made while offline, one per user and recipe (only the latest step matters)
+const QUEUE = 'kitchenbuddy-progress-queue';
+const PROGRESS_PATH = '/api/cooking/progress';
+// Shared by every user before caches were kept per user
+const LEGACY_CACHES = ['kitchenbuddy-voice-v1'];
+
+// User named in the latest page message; queued progress is only replayed for them
+let signedInUser = null;
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(Promise.all(LEGACY_CACHES.map(key => caches.delete(key)))
+        .then(() => self.clients.claim()));
+});
+
+self.addEventListener('message', (event) => {
+    const data = event.data || {};
+    // Pages say who is signed in, so one user's cache and queue never reach the next
+    if (data.type === 'cache-urls') {
+        event.waitUntil(setUser(data.user).then(() => cacheUrls(data.user, data.urls || [])));
+    } else if (data.type === 'replay-progress') {
+        event.waitUntil(setUser(data.user).then(() => replayProgress(data.user)));
+    }
+});
+
+self.addEventListener('sync', (event) => {
+    if (event.tag === 'progress') {
+        event.waitUntil(replayProgress(signedInUser));
+    }
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    if (request.method === 'POST' && url.pathname === PROGRESS_PATH) {
+        event.respondWith(sendProgress(request));
+        return;
+    }
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    if (request.mode === 'navigate' && url.pathname === '/voice_only') {
+        event.respondWith(networkFirst(request));
+    } else if (/^\/api\/recipes\/\d+\/bundle$/.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(request));
+    } else if (url.origin !== self.location.origin || url.pathname.startsWith('/assets/')
+               || url.pathname.startsWith('/static/') || /\/audio$/.test(url.pathname)) {
+        event.respondWith(cacheFirst(request));
+    }
+});
+
+async function setUser(user) {
+    signedInUser = user;
+    // Another user signed in on this device: drop what the previous one cached or queued
+    const current = CACHE_PREFIX + user;
+    const stale = (await caches.keys()).filter(key => key.startsWith(CACHE_PREFIX) && key !== current);
+    await Promise.all(stale.map(key => caches.delete(key)));
+    const queue = await caches.open(QUEUE);
+    const prefix = queueKey(user, '');
+    const others = (await queue.keys()).filter(key => !new URL(key.url).pathname.startsWith(prefix));
+    await Promise.all(others.map(key => queue.delete(key)));
+}
+
+async function userCache() {
+    // The signed-in user's cache, or null before one was made (or after logout cleared it)
+    const name = (await caches.keys()).find(key => key.startsWith(CACHE_PREFIX));
+    return name ? caches.open(name) : null;
+}
+
+async function cacheUrls(user, urls) {
+    const cache = await caches.open(CACHE_PREFIX + user);
+    await Promise.all(urls.map(async (url) => {
+        if (await cache.match(url)) {
+            return;
+        }
+        try {
+            const sameOrigin = new URL(url, self.location.href).origin === self.location.origin;
+            const response = await fetch(url, sameOrigin ? { credentials: 'same-origin' } : { mode: 'no-cors' });
+            if (response.ok || response.type === 'opaque') {
+                await cache.put(url, response);
+            }
+        } catch (error) {
+            console.error('Could not cache', url, error);
+        }
+    }));
+}
+
+async function networkFirst(request) {
+    const cache = await userCache();
+    if (!cache) {
+        return fetch(request);
+    }
+    try {
+        const response = await fetch(request);
+        // A redirect means the user was signed out; the login page must not stand in for this one
+        if (response.ok && !response.redirected) {
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request, { ignoreSearch: true });
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+async function staleWhileRevalidate(request) {
+    const cache = await userCache();
+    if (!cache) {
+        return fetch(request);
+    }
+    const cached = await cache.match(request);
+    const refresh = fetch(request).then(async (response) => {
+        if (response.ok) {
+            await cache.put(request, response.clone());
+        }
+        return response;
+    });
+    if (cached) {
+        refresh.catch(() => {});
+        return cached;
+    }
+    return refresh;
+}
+
+async function cacheFirst(request) {
+    const cache = await userCache();
+    const cached = cache && await cache.match(request);
+    return cached || fetch(request);
+}
+
+function queueKey(user, recipeId) {
+    return `${PROGRESS_PATH}/queued/${user}/${recipeId}`;
+}
+
+async function sendProgress(request) {
+    const body = await request.clone().text();
+    const { user, recipe_id: recipeId } = JSON.parse(body || '{}');
+    const queue = await caches.open(QUEUE);
+    try {
+        const response = await fetch(request);
+        // A newer step reached the server; an older queued one must not overwrite it
+        await queue.delete(queueKey(user, recipeId));
+        return response;
+    } catch (error) {
+        await queue.put(queueKey(user, recipeId), new Response(body));
+        if (self.registration.sync) {
+            self.registration.sync.register('progress').catch(() => {});
+        }
+        return new Response(JSON.stringify({ success: true, queued: true }), {
+            status: 202,
+            headers: { 'Content-Type': 'application/json' }
+        });
+    }
+}
+
+async function replayProgress(user) {
+    // Until a page names the signed-in user, the cookies may belong to someone else
+    if (!user) {
+        return;
+    }
+    const queue = await caches.open(QUEUE);
+    const prefix = queueKey(user, '');
+    for (const key of await queue.keys()) {
+        if (!new URL(key.url).pathname.startsWith(prefix)) {
+            continue;
+        }
+        const queued = await queue.match(key);
+        try {
+            const response = await fetch(PROGRESS_PATH, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                credentials: 'same-origin',
+                body: await queued.text()
+            });
+            // Rejected updates (session ended, recipe changed) are dropped too
+            if (response.status < 500) {
+                await queue.delete(key);
+            }
+        } catch (error) {
+            return;  // still offline; try again on the next sync
+        }
+    }
+}
@@ -0,0 +1,173 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+
+
+class CommandLogger:
+    """
+    Write-behind logger for VoiceCommand rows.
+
+    Request handlers hand a finished command to log(), which only appends it
+    to an in-memory buffer. A background thread writes buffered commands in
+    one batched INSERT when the batch size is reached or the flush interval
+    elapses, and once more at interpreter shutdown. A batch that fails is
+    retried a few times, then written a row at a time so that only rows
+    which cannot be stored are dropped. If the database falls behind and
+    the buffer fills, log() blocks until there is room again.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 2.0, max_buffer: int = 10000,
+                 retries: int = 3, retry_delay: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.app = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._listeners = []
+
+    def init_app(self, app):
+        """
+        Bind to a Flask app; settings come from VOICE_LOG_* config keys
+        """
+        self.app = app
+        self.batch_size = app.config.get('VOICE_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('VOICE_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.max_buffer = app.config.get('VOICE_LOG_MAX_BUFFER', self.max_buffer)
+        self.retries = app.config.get('VOICE_LOG_RETRIES', self.retries)
+        self.retry_delay = app.config.get('VOICE_LOG_RETRY_DELAY', self.retry_delay)
+        atexit.register(self.shutdown)
+
+    def add_listener(self, callback):
+        """
+        Call `callback(records)` inside an app context after each batch is written
+        """
+        self._listeners.append(callback)
+
+    def _ensure_started(self):
+        # Started lazily, and restarted in forked workers, since threads do not survive a fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_buffer)
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._worker, name='voice-command-logger', daemon=True)
+            self._thread.start()
+
+    def log(self, user_id: int, command_text: str, intent_detected: Optional[str] = None,
+            response_generated: Optional[str] = None, success: bool = True,
+            timestamp: Optional[datetime] = None):
+        """
+        Queue a voice command for writing; blocks only if the buffer is full
+        """
+        self._ensure_started()
+        self._queue.put({
+            'user_id': user_id,
+            'command_text': command_text,
+            'intent_detected': intent_detected,
+            'response_generated': response_generated,
+            'success': success,
+            'timestamp': timestamp or datetime.utcnow()
+        })
+
+    def pending(self) -> int:
+        """
+        Number of commands waiting to be written
+        """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _drain(self, limit: int) -> List[Dict]:
+        records = []
+        while len(records) < limit:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            # Wait for a full batch or the end of the interval, whichever comes first
+            while self._queue.qsize() < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stopping.wait(min(remaining, 0.05))
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far; returns the number of rows written
+        """
+        if self._queue is None or self.app is None:
+            return 0
+        written = 0
+        with self._flush_lock:
+            while True:
+                records = self._drain(self.batch_size)
+                if not records:
+                    break
+                written += self._write(records)
+        return written
+
+    def _insert(self, records: List[Dict]) -> bool:
+        from models import db
+        from models.db_models import VoiceCommand
+        try:
+            db.session.execute(insert(VoiceCommand), records)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error writing {len(records)} voice commands: {e}")
+            return False
+
+    def _write(self, records: List[Dict]) -> int:
+        from models import db
+        with self.app.app_context():
+            # A locked database is usually gone a moment later, so retry the whole batch first
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.retry_delay * attempt)
+                if self._insert(records):
+                    break
+            else:
+                records = [record for record in records if self._insert([record])]
+                if not records:
+                    return 0
+            for listener in self._listeners:
+                try:
+                    listener(records)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error in voice command listener: {e}")
+        return len(records)
+
+    def shutdown(self):
+        """
+        Stop the background thread and write whatever is still buffered
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+# Global command logger instance
+command_logger = CommandLogger()
@@ -0,0 +1,228 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+
+class CommandRetention:
+    """
+    Keeps the VoiceCommand table bounded.
+
+    rollup() folds raw commands into hourly and daily per-intent counts in
+    VoiceCommandRollup and counts unrecognized phrases, resuming after the
+    last command it already counted, so each run only reads new rows.
+    archive() then moves rolled-up commands older than the retention window
+    to gzipped NDJSON files and deletes them from the table, a bounded batch
+    per transaction.
+    """
+
+    def __init__(self, retention_days: int = 30, batch_size: int = 5000, archive_dir: Optional[str] = None):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+
+    def init_app(self, app):
+        """
+        Settings come from VOICE_LOG_RETENTION_DAYS, VOICE_LOG_ROLLUP_BATCH
+        and VOICE_LOG_ARCHIVE_DIR (default: <instance>/voice_archive)
+        """
+        self.retention_days = app.config.get('VOICE_LOG_RETENTION_DAYS', self.retention_days)
+        self.batch_size = app.config.get('VOICE_LOG_ROLLUP_BATCH', self.batch_size)
+        self.archive_dir = app.config.get('VOICE_LOG_ARCHIVE_DIR') or os.path.join(app.instance_path, 'voice_archive')
+
+    @staticmethod
+    def _periods(timestamp: datetime):
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        return (('hour', hour), ('day', hour.replace(hour=0)))
+
+    def _watermark(self) -> int:
+        """
+        Id of the last command already rolled up
+        """
+        from models import db
+        from models.db_models import RollupWatermark
+        last_id = db.session.query(RollupWatermark.last_id).filter_by(name='voice_command').scalar()
+        if last_id is None:
+            try:
+                db.session.add(RollupWatermark(name='voice_command', last_id=0))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()  # another worker created it first
+            last_id = 0
+        return last_id
+
+    def rollup(self) -> int:
+        """
+        Add commands logged since the last run to the hourly and daily
+        rollups; returns the number of commands processed
+        """
+        from models import db
+        from models.db_models import VoiceCommand, VoiceCommandRollup, UnrecognizedPhrase, RollupWatermark
+
+        processed = 0
+        while True:
+            last_id = self._watermark()
+            rows = db.session.execute(
+                select(VoiceCommand.id, VoiceCommand.timestamp, VoiceCommand.intent_detected,
+                       VoiceCommand.success, VoiceCommand.command_text)
+                .where(VoiceCommand.id > last_id)
+                .order_by(VoiceCommand.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                db.session.commit()
+                return processed
+
+            deltas: Dict[Tuple[str, datetime, str], list] = defaultdict(lambda: [0, 0])
+            phrases: Dict[str, list] = {}
+            for _id, timestamp, intent, success, text in rows:
+                timestamp = timestamp or datetime.utcnow()
+                for period, start in self._periods(timestamp):
+                    delta = deltas[(period, start, intent or 'unknown')]
+                    delta[0] += 1
+                    delta[1] += 1 if success else 0
+                if (intent or 'unknown') == 'unknown':
+                    phrase = ' '.join((text or '').lower().split())[:200]
+                    if phrase:
+                        seen = phrases.setdefault(phrase, [0, timestamp])
+                        seen[0] += 1
+                        seen[1] = max(seen[1], timestamp)
+
+            # Load the rollup rows this batch touches, then add to them in place
+            starts = {start for _period, start, _intent in deltas}
+            existing = {
+                (r.period, r.period_start, r.intent): r
+                for r in VoiceCommandRollup.query.filter(VoiceCommandRollup.period_start.in_(starts)).all()
+            }
+            for key, (count, successes) in deltas.items():
+                rollup = existing.get(key)
+                if rollup is None:
+                    rollup = VoiceCommandRollup(period=key[0], period_start=key[1], intent=key[2],
+                                                command_count=0, success_count=0)
+                    db.session.add(rollup)
+                rollup.command_count += count
+                rollup.success_count += successes
+
+            if phrases:
+                known = {p.phrase: p for p in UnrecognizedPhrase.query.filter(UnrecognizedPhrase.phrase.in_(list(phrases))).all()}
+                for phrase, (count, last_seen) in phrases.items():
+                    entry = known.get(phrase)
+                    if entry is None:
+                        entry = UnrecognizedPhrase(phrase=phrase, count=0)
+                        db.session.add(entry)
+                    entry.count += count
+                    entry.last_seen = max(entry.last_seen, last_seen) if entry.last_seen else last_seen
+
+            # Advance the watermark only from where this batch started; if another
+            # worker got there first, drop this batch rather than count it twice
+            moved = db.session.execute(
+                update(RollupWatermark)
+                .where(RollupWatermark.name == 'voice_command', RollupWatermark.last_id == last_id)
+                .values(last_id=rows[-1][0], updated_at=datetime.utcnow())
+            ).rowcount
+            if not moved:
+                db.session.rollback()
+                return processed
+            db.session.commit()
+            processed += len(rows)
+
+    def summary(self, days: int = 7, top: int = 20) -> Dict:
+        """
+        Intent distribution, failure rates and top unrecognized phrases,
+        read from the rollup tables only
+        """
+        from models import db
+        from models.db_models import VoiceCommandRollup, UnrecognizedPhrase
+
+        since = (datetime.utcnow() - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = db.session.query(
+            VoiceCommandRollup.intent,
+            func.sum(VoiceCommandRollup.command_count),
+            func.sum(VoiceCommandRollup.success_count)
+        ).filter(
+            VoiceCommandRollup.period == 'day',
+            VoiceCommandRollup.period_start >= since
+        ).group_by(VoiceCommandRollup.intent).all()
+
+        intents = sorted(({
+            'intent': intent,
+            'count': int(count or 0),
+            'failures': int((count or 0) - (successes or 0)),
+            'failure_rate': (1 - (successes or 0) / count) if count else 0.0
+        } for intent, count, successes in rows), key=lambda i: i['count'], reverse=True)
+        total = sum(i['count'] for i in intents)
+        failures = sum(i['failures'] for i in intents)
+        unknown = next((i['count'] for i in intents if i['intent'] == 'unknown'), 0)
+
+        daily = db.session.query(
+            VoiceCommandRollup.period_start,
+            func.sum(VoiceCommandRollup.command_count),
+            func.sum(VoiceCommandRollup.success_count)
+        ).filter(
+            VoiceCommandRollup.period == 'day',
+            VoiceCommandRollup.period_start >= since
+        ).group_by(VoiceCommandRollup.period_start).order_by(VoiceCommandRollup.period_start).all()
+
+        phrases = UnrecognizedPhrase.query.order_by(UnrecognizedPhrase.count.desc()).limit(top).all()
+
+        return {
+            'days': days,
+            'total': total,
+            'failures': failures,
+            'failure_rate': failures / total if total else 0.0,
+            'unknown': unknown,
+            'unknown_rate': unknown / total if total else 0.0,
+            'intents': intents,
+            'daily': [{'day': day, 'count': int(count or 0), 'failures': int((count or 0) - (successes or 0))}
+                      for day, count, successes in daily],
+            'unrecognized': [{'phrase': p.phrase, 'count': p.count, 'last_seen': p.last_seen} for p in phrases]
+        }
+
+    def archive(self, now: Optional[datetime] = None) -> int:
+        """
+        Move rolled-up commands older than the retention window to a
+        gzipped NDJSON file and delete them; returns the number archived
+        """
+        from models import db
+        from models.db_models import VoiceCommand
+
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        last_rolled_up = self._watermark()
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"voice_commands-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson.gz")
+
+        archived = 0
+        while True:
+            rows = VoiceCommand.query.filter(
+                VoiceCommand.timestamp < cutoff,
+                VoiceCommand.id <= last_rolled_up
+            ).order_by(VoiceCommand.id).limit(self.batch_size).all()
+            if not rows:
+                return archived
+
+            # Each batch is its own gzip member, so the file stays readable
+            # even if a later batch fails; rows are only deleted once written.
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({
+                        'id': row.id,
+                        'user_id': row.user_id,
+                        'command_text': row.command_text,
+                        'intent_detected': row.intent_detected,
+                        'response_generated': row.response_generated,
+                        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+                        'success': row.success
+                    }) + '\n')
+
+            db.session.execute(delete(VoiceCommand).where(VoiceCommand.id.in_([row.id for row in rows])))
+            db.session.commit()
+            archived += len(rows)
+
+
+# Global command retention instance
+command_retention = CommandRetention()
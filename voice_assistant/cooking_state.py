@@ -0,0 +1,308 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import update
+from models import db
+from models.db_models import CookingSession, Recipe
+from models.step_cache import step_cache, recipe_version
+from voice_assistant.session_manager import session_manager
+
+
+class MemoryStateBackend:
+    """
+    Cooking state kept in this process only
+    """
+
+    def __init__(self):
+        self._states: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        return self._states.get(user_id)
+
+    def set(self, user_id: int, state: Dict):
+        with self._lock:
+            self._states[user_id] = state
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    def delete_recipe(self, recipe_id: int):
+        with self._lock:
+            for user_id in [u for u, s in self._states.items() if s.get('recipe_id') == recipe_id]:
+                del self._states[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._states = {}
+
+
+class SqliteStateBackend:
+    """
+    Cooking state in a local SQLite file, shared by all workers on the host
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cooking_state '
+                         '(user_id INTEGER PRIMARY KEY, recipe_id INTEGER, state TEXT NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cooking_state_recipe ON cooking_state (recipe_id)')
+
+    def _connect(self):
+        # One connection per thread (and per process, since connections do not survive a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        row = self._connect().execute('SELECT state FROM cooking_state WHERE user_id = ?', (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, user_id: int, state: Dict):
+        self._connect().execute('INSERT OR REPLACE INTO cooking_state (user_id, recipe_id, state) VALUES (?, ?, ?)',
+                                (user_id, state.get('recipe_id'), json.dumps(state)))
+
+    def delete(self, user_id: int):
+        self._connect().execute('DELETE FROM cooking_state WHERE user_id = ?', (user_id,))
+
+    def delete_recipe(self, recipe_id: int):
+        self._connect().execute('DELETE FROM cooking_state WHERE recipe_id = ?', (recipe_id,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cooking_state')
+
+
+class CookingStateStore:
+    """
+    Per-user cooking state: the active session and its recipe. Steps are
+    read from the shared step cache by the recipe version recorded here.
+
+    Voice commands and step pages read this instead of querying the session,
+    recipe and steps on every request. A user's state is loaded from the
+    database on first use and reloaded once it is older than the TTL, so
+    changes made elsewhere (e.g. idle expiry) show up within that window.
+    Step changes and activity are written back to CookingSession by a
+    background thread, coalesced per session. Navigation that already
+    updated the row itself (see CookingSessionManager) only records the
+    result here.
+    """
+
+    def __init__(self, ttl: int = 300, flush_interval: float = 1.0):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.app = None
+        self.backend = MemoryStateBackend()
+        self._pending: Dict[int, Dict] = {}  # session_id -> column values to write
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._listeners = []
+
+    def init_app(self, app):
+        """
+        COOKING_STATE_BACKEND is 'memory' (default) or 'sqlite', stored at
+        COOKING_STATE_PATH (default: <instance>/cooking_state.sqlite3);
+        COOKING_STATE_TTL and COOKING_STATE_FLUSH_INTERVAL are in seconds
+        """
+        self.app = app
+        self.ttl = app.config.get('COOKING_STATE_TTL', self.ttl)
+        self.flush_interval = app.config.get('COOKING_STATE_FLUSH_INTERVAL', self.flush_interval)
+        if app.config.get('COOKING_STATE_BACKEND', 'memory') == 'sqlite':
+            path = app.config.get('COOKING_STATE_PATH') or os.path.join(app.instance_path, 'cooking_state.sqlite3')
+            self.backend = SqliteStateBackend(path)
+        atexit.register(self.shutdown)
+
+    def add_listener(self, callback):
+        """
+        Call `callback(user_id, state)` whenever a user moves to a different step
+        """
+        self._listeners.append(callback)
+
+    def _load(self, user_id: int) -> Dict:
+        cooking_session = session_manager.active_session(user_id, touch=False)
+        recipe = db.session.get(Recipe, cooking_session.recipe_id) if cooking_session else None
+        if recipe is None:
+            # Cached too, so users who aren't cooking don't cost a query per request
+            return {'session_id': None, 'loaded_at': time.time()}
+        session_manager.ensure_total_steps(cooking_session)
+        return {
+            'session_id': cooking_session.id,
+            'recipe_id': recipe.id,
+            'recipe_version': recipe_version(recipe.updated_at),
+            'recipe_title': recipe.title,
+            'ingredients': recipe.ingredients,
+            'current_step': cooking_session.current_step or 1,
+            'total_steps': len(step_cache.for_recipe(recipe)),
+            'loaded_at': time.time(),
+            'touched_at': time.time()
+        }
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """
+        The user's cooking state, or None if they have no active session
+        """
+        state = self.backend.get(user_id)
+        if state is None or time.time() - state['loaded_at'] > self.ttl:
+            state = self._load(user_id)
+            self.backend.set(user_id, state)
+        if state['session_id'] is None:
+            return None
+        if time.time() - state['touched_at'] > session_manager.touch_interval:
+            state['touched_at'] = time.time()
+            self.backend.set(user_id, state)
+            self._enqueue(state['session_id'], {})
+        return state
+
+    def steps(self, state: Dict):
+        """
+        The steps of the state's recipe, from the step cache
+        """
+        return step_cache.get(state['recipe_id'], state['recipe_version'])
+
+    def step(self, state: Dict, step_number: Optional[int] = None):
+        """
+        A step of the state's recipe (default: the current one)
+        """
+        steps = self.steps(state)
+        number = step_number or state['current_step']
+        if 1 <= number <= len(steps):
+            return steps[number - 1]
+        return None
+
+    def set_step(self, user_id: int, step_number: int, persisted: bool = False):
+        """
+        Record the user's current step; written back to the session in the
+        background unless the caller already persisted it
+        """
+        state = self.backend.get(user_id)
+        if not state or state['session_id'] is None:
+            return
+        changed = state['current_step'] != step_number
+        state['current_step'] = step_number
+        state['touched_at'] = time.time()
+        self.backend.set(user_id, state)
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(user_id, state)
+                except Exception as e:
+                    print(f"Error in cooking state listener: {e}")
+        if persisted:
+            # Don't let an older queued write land after the caller's own UPDATE
+            with self._lock:
+                pending = self._pending.get(state['session_id'])
+                if pending:
+                    pending.pop('current_step', None)
+        else:
+            self._enqueue(state['session_id'], {'current_step': step_number})
+
+    def invalidate(self, user_id: int):
+        """
+        Drop a user's state, e.g. after their session was started or ended
+        """
+        self.backend.delete(user_id)
+
+    def invalidate_recipe(self, recipe_id: int):
+        """
+        Drop the state of everyone cooking a recipe that was edited or deleted
+        """
+        self.backend.delete_recipe(recipe_id)
+
+    def clear(self):
+        self.backend.clear()
+
+    def _enqueue(self, session_id: int, values: Dict):
+        self._ensure_started()
+        with self._lock:
+            pending = self._pending.setdefault(session_id, {})
+            pending.update(values)
+            pending['last_activity'] = datetime.utcnow()
+
+    def _ensure_started(self):
+        # Started lazily, and restarted in forked workers, since threads do not survive a fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pending = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='cooking-state-writer', daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while not self._wakeup.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write queued step changes and activity to CookingSession; returns the
+        number of sessions updated
+        """
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            return self._write(pending)
+
+    def flush_session(self, session_id: int) -> int:
+        """
+        Write one session's queued changes now, e.g. before an UPDATE that
+        moves relative to the stored step
+        """
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                values = self._pending.pop(session_id, None)
+            return self._write({session_id: values} if values else {})
+
+    def _write(self, pending: Dict) -> int:
+        if not pending:
+            return 0
+        with self.app.app_context():
+            try:
+                for session_id, values in pending.items():
+                    db.session.execute(
+                        update(CookingSession)
+                        .where(CookingSession.id == session_id, CookingSession.is_active.is_(True))
+                        .values(**values)
+                        .execution_options(synchronize_session=False)
+                    )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error writing cooking state for {len(pending)} sessions: {e}")
+                return 0
+        return len(pending)
+
+    def shutdown(self):
+        """
+        Stop the writer thread and write whatever is still queued
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+# Global cooking state store instance
+cooking_state = CookingStateStore()
@@ -1,6 +1,8 @@
+import math
 import re
 from difflib import SequenceMatcher
 from models.db_models import Recipe
+from models.durations import extract_durations
 
 class IntentDetector:
     def __init__(self):
@@ -162,45 +164,31 @@ class IntentDetector:
                 best_match = recipe
         return best_match
 
-    def extract_timer_duration(self, text):
+    def extract_timer_duration(self, text, default=5):
         """
-        Extract timer duration from text
+        Extract timer duration in whole minutes from text, read with the same
+        grammar as recipe steps ("ten minutes", "an hour and a half");
+        `default` when no duration is said
         """
-        if not text:
-            return 5  # Default 5 minutes
-        text = text.lower()
-        time_patterns = {
-            r'(\d+)\s*minutes?': lambda x: int(x),
-            r'(\d+)\s*mins?': lambda x: int(x),
-            r'(\d+)\s*min': lambda x: int(x),
-            r'five\s*minutes?': lambda x: 5,
-            r'ten\s*minutes?': lambda x: 10,
-            r'fifteen\s*minutes?': lambda x: 15,
-            r'thirty\s*minutes?': lambda x: 30,
-            r'one\s*hour': lambda x: 60,
-            r'(\d+)\s*hours?': lambda x: int(x) * 60,
-            r'(\d+)\s*hrs?': lambda x: int(x) * 60
-        }
-        for pattern, converter in time_patterns.items():
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    if 'hour' in pattern or 'hr' in pattern:
-                        return converter(match.group(1))
-                    elif 'five' in pattern or 'ten' in pattern or 'fifteen' in pattern or 'thirty' in pattern:
-                        return converter(None)
-                    else:
-                        return converter(match.group(1))
-                except (ValueError, IndexError):
-                    continue
-        return 5  # Default 5 minutes
+        durations = extract_durations(text)
+        if not durations:
+            return default
+        return max(1, math.ceil(durations[0].low / 60))
 
     def extract_dietary_preference(self, text):
         """
         Extract dietary preference from text
         """
+        preferences = self.extract_dietary_preferences(text)
+        return preferences[0] if preferences else None
+
+    def extract_dietary_preferences(self, text):
+        """
+        Extract every dietary preference mentioned in text,
+        e.g. "vegan and gluten free" -> ['vegan', 'gluten-free']
+        """
         if not text:
-            return None
+            return []
         text = text.lower()
         dietary_keywords = {
             'vegan': ['vegan', 'no animal products'],
@@ -212,7 +200,5 @@ class IntentDetector:
             'low-sodium': ['low sodium', 'low-sodium', 'no salt'],
             'low-fat': ['low fat', 'low-fat', 'fat-free']
         }
-        for preference, keywords in dietary_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return preference
-        return None 
\ No newline at end of file
+        return [preference for preference, keywords in dietary_keywords.items()
+                if any(keyword in text for keyword in keywords)] 
\ No newline at end of file
@@ -0,0 +1,227 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.db_models import CookingSession, Step
+
+
+class CookingSessionManager:
+    """
+    Lifecycle and step navigation for cooking sessions.
+
+    A user has at most one active session: starting a recipe closes the
+    previous one, and a partial unique index on user_id backs this up and
+    keeps the active-session lookup a single index probe. last_activity is
+    only written when it is older than the touch interval, and sessions idle
+    for longer than the idle timeout are expired in batches, at most once per
+    expiry interval per process.
+
+    Every move is a single conditional UPDATE that checks the bounds in its
+    WHERE clause and returns the new step, so two devices (or a double tap)
+    can never lose an update or step past either end of the recipe.
+    """
+
+    def __init__(self, idle_minutes: int = 240, touch_interval: int = 60,
+                 expiry_interval: int = 300, batch_size: int = 500):
+        self.idle_minutes = idle_minutes
+        self.touch_interval = touch_interval
+        self.expiry_interval = expiry_interval
+        self.batch_size = batch_size
+        self._next_expiry = 0.0
+        self._expiry_lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Settings come from COOKING_SESSION_IDLE_MINUTES, COOKING_SESSION_TOUCH_INTERVAL
+        and COOKING_SESSION_EXPIRY_INTERVAL (seconds)
+        """
+        self.idle_minutes = app.config.get('COOKING_SESSION_IDLE_MINUTES', self.idle_minutes)
+        self.touch_interval = app.config.get('COOKING_SESSION_TOUCH_INTERVAL', self.touch_interval)
+        self.expiry_interval = app.config.get('COOKING_SESSION_EXPIRY_INTERVAL', self.expiry_interval)
+
+    def active_session(self, user_id: int, touch: bool = True) -> Optional[CookingSession]:
+        """
+        The user's active cooking session, if any; counts as activity unless touch=False
+        """
+        self._maybe_expire()
+        cooking_session = CookingSession.query.filter_by(user_id=user_id, is_active=True).first()
+        if cooking_session is not None and touch:
+            self.touch(cooking_session)
+        return cooking_session
+
+    def start(self, user_id: int, recipe_id: int, total_steps: int) -> CookingSession:
+        """
+        Start a session for a recipe, closing whatever the user was cooking before
+        """
+        for _attempt in range(2):
+            db.session.execute(
+                update(CookingSession)
+                .where(CookingSession.user_id == user_id, CookingSession.is_active.is_(True))
+                .values(is_active=False)
+                .execution_options(synchronize_session=False)
+            )
+            cooking_session = CookingSession(user_id=user_id, recipe_id=recipe_id,
+                                             current_step=1, total_steps=total_steps)
+            db.session.add(cooking_session)
+            try:
+                db.session.commit()
+                return cooking_session
+            except IntegrityError:
+                # Another request started a session at the same moment; close it and retry
+                db.session.rollback()
+        raise RuntimeError(f'Could not start a cooking session for user {user_id}')
+
+    def end(self, session_id: int):
+        """
+        Mark a session as completed
+        """
+        db.session.execute(
+            update(CookingSession)
+            .where(CookingSession.id == session_id, CookingSession.is_active.is_(True))
+            .values(is_active=False, completed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def touch(self, cooking_session: CookingSession):
+        """
+        Record activity, writing at most once per touch interval
+        """
+        now = datetime.utcnow()
+        threshold = now - timedelta(seconds=self.touch_interval)
+        if cooking_session.last_activity and cooking_session.last_activity > threshold:
+            return
+        db.session.execute(
+            update(CookingSession)
+            .where(CookingSession.id == cooking_session.id,
+                   (CookingSession.last_activity < threshold) | CookingSession.last_activity.is_(None))
+            .values(last_activity=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def expire_idle(self, now: Optional[datetime] = None) -> int:
+        """
+        Deactivate sessions idle for longer than the idle timeout, a batch per
+        transaction; returns the number expired
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(minutes=self.idle_minutes)
+        expired = 0
+        while True:
+            ids = db.session.execute(
+                select(CookingSession.id)
+                .where(CookingSession.is_active.is_(True), CookingSession.last_activity < cutoff)
+                .limit(self.batch_size)
+            ).scalars().all()
+            if not ids:
+                db.session.commit()
+                return expired
+            expired += db.session.execute(
+                update(CookingSession)
+                .where(CookingSession.id.in_(ids), CookingSession.last_activity < cutoff)
+                .values(is_active=False)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+
+    def _maybe_expire(self):
+        now = time.monotonic()
+        if now < self._next_expiry or not self._expiry_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_expiry = now + self.expiry_interval
+            self.expire_idle()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error expiring idle cooking sessions: {e}")
+        finally:
+            self._expiry_lock.release()
+
+    def close_duplicates(self) -> int:
+        """
+        Keep only each user's newest active session (for databases created
+        before one active session per user was enforced); returns the number closed
+        """
+        newest = (
+            select(func.max(CookingSession.id))
+            .where(CookingSession.is_active.is_(True))
+            .group_by(CookingSession.user_id)
+        )
+        closed = db.session.execute(
+            update(CookingSession)
+            .where(CookingSession.is_active.is_(True), CookingSession.id.not_in(newest))
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return closed
+
+    def _update_step(self, session_id: int, new_value, *conditions) -> Optional[int]:
+        stmt = (
+            update(CookingSession)
+            .where(CookingSession.id == session_id, CookingSession.is_active.is_(True), *conditions)
+            .values(current_step=new_value, last_activity=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if db.engine.dialect.update_returning:
+            new_step = db.session.execute(stmt.returning(CookingSession.current_step)).scalar()
+        else:
+            moved = db.session.execute(stmt).rowcount
+            new_step = db.session.execute(
+                select(CookingSession.current_step).where(CookingSession.id == session_id)
+            ).scalar() if moved else None
+        db.session.commit()
+        return new_step
+
+    def move(self, session_id: int, delta: int) -> Optional[int]:
+        """
+        Move a session `delta` steps forward (or back); returns the new step,
+        or None if that would leave the recipe
+        """
+        if delta > 0:
+            bound = CookingSession.current_step + delta <= CookingSession.total_steps
+        else:
+            bound = CookingSession.current_step + delta >= 1
+        return self._update_step(session_id, CookingSession.current_step + delta, bound)
+
+    def jump(self, session_id: int, step_number: int) -> Optional[int]:
+        """
+        Go straight to a step; returns it, or None if it is out of range
+        """
+        if step_number < 1:
+            return None
+        return self._update_step(session_id, step_number, CookingSession.total_steps >= step_number)
+
+    def ensure_total_steps(self, cooking_session) -> int:
+        """
+        Fill in the cached step count for sessions created before it existed
+        """
+        if cooking_session.total_steps is None:
+            cooking_session.total_steps = db.session.query(func.count(Step.id)).filter_by(
+                recipe_id=cooking_session.recipe_id
+            ).scalar()
+            db.session.commit()
+        return cooking_session.total_steps
+
+    def refresh_total_steps(self, recipe_id: int, total_steps: int):
+        """
+        Update the cached step count of active sessions after a recipe's steps change
+        """
+        db.session.execute(
+            update(CookingSession)
+            .where(CookingSession.recipe_id == recipe_id, CookingSession.is_active.is_(True))
+            .values(
+                total_steps=total_steps,
+                current_step=case((CookingSession.current_step > total_steps, max(total_steps, 1)),
+                                  else_=CookingSession.current_step)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+# Global cooking session manager instance
+session_manager = CookingSessionManager()
@@ -22,7 +22,7 @@ class TextToSpeech:
         if not os.path.exists(self.audio_dir):
             os.makedirs(self.audio_dir)
     
-    def convert_text_to_speech(self, text, use_online=True):
+    def convert_text_to_speech(self, text, use_online=True, filename=None):
         """
         Convert text to speech and return the audio file path
         """
@@ -30,8 +30,8 @@ class TextToSpeech:
             return None
         
         try:
-            # Generate unique filename
-            filename = f"speech_{uuid.uuid4().hex[:8]}.mp3"
+            # Generate unique filename unless the caller names the file
+            filename = filename or f"speech_{uuid.uuid4().hex[:8]}.mp3"
             filepath = os.path.join(self.audio_dir, filename)
             
             if use_online and self._is_internet_available():
@@ -1,115 +1,215 @@
+import heapq
+import itertools
+import os
 import threading
-import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from voice_assistant.text_to_speech import TextToSpeech
 
+# Most timers one user can run at once
+MAX_TIMERS_PER_USER = 20
+
 class TimerManager:
+    """
+    Cooking timers, namespaced per user.
+    
+    Timers are keyed by (user_id, timer_id), so two users can both have a
+    timer called 'pasta'; user_id None is a shared namespace for callers
+    without a user. An index by user makes listing one user's timers
+    independent of everyone else's. A single scheduler thread waits for
+    the next timer to end, so extending a timer just moves its end time.
+    """
+    
     def __init__(self):
-        self.active_timers: Dict[str, Dict] = {}
+        self.active_timers: Dict[Tuple[Optional[int], str], Dict] = {}
+        self._by_user: Dict[Optional[int], set] = {}
         self.tts = TextToSpeech()
         self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._schedule: List = []  # heap of (end_time, seq, key)
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._listeners = []
+    
+    def add_listener(self, callback: Callable):
+        """
+        Call `callback(event, timer)` when a timer is 'started', 'extended',
+        'expired' or 'cancelled'; timer is the public view from timer_payload
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str, timer_info: Dict):
+        payload = self.timer_payload(timer_info)
+        for listener in self._listeners:
+            try:
+                listener(event, payload)
+            except Exception as e:
+                print(f"Error in timer listener: {e}")
+    
+    @staticmethod
+    def timer_payload(timer_info: Dict) -> Dict:
+        """
+        JSON-safe view of a timer; ends_at is a Unix timestamp so clients can count down themselves
+        """
+        remaining = timer_info['end_time'] - datetime.now()
+        return {
+            'id': timer_info['id'],
+            'user_id': timer_info.get('user_id'),
+            'label': timer_info.get('label'),
+            'duration_minutes': timer_info['duration_minutes'],
+            'ends_at': timer_info['end_time'].timestamp(),
+            'remaining_seconds': max(0, int(remaining.total_seconds())) if timer_info['is_active'] else 0,
+            'is_active': timer_info['is_active']
+        }
     
-    def start_timer(self, timer_id: str, minutes: int, callback: Optional[Callable] = None) -> bool:
+    def _ensure_started(self):
+        # Started lazily, and restarted in forked workers, since threads do not survive a fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._scheduler, name='cooking-timers', daemon=True)
+        self._thread.start()
+    
+    def _schedule_timer(self, key, timer_info: Dict):
+        heapq.heappush(self._schedule, (timer_info['end_time'], next(self._seq), key))
+        self._wakeup.notify()
+    
+    def start_timer(self, timer_id: str, minutes: float, callback: Optional[Callable] = None,
+                    user_id: Optional[int] = None, label: Optional[str] = None) -> bool:
         """
         Start a timer with voice notification
         """
         try:
+            key = (user_id, timer_id)
             with self._lock:
-                if timer_id in self.active_timers:
+                if key in self.active_timers:
                     return False  # Timer already exists
+                if len(self._by_user.get(user_id, ())) >= MAX_TIMERS_PER_USER:
+                    return False
                 
                 # Create timer info
                 timer_info = {
                     'id': timer_id,
+                    'user_id': user_id,
+                    'label': label,
                     'duration_minutes': minutes,
                     'start_time': datetime.now(),
                     'end_time': datetime.now() + timedelta(minutes=minutes),
                     'callback': callback,
-                    'thread': None,
                     'is_active': True
                 }
-                
-                # Start timer thread
-                timer_thread = threading.Thread(
-                    target=self._timer_worker,
-                    args=(timer_id, minutes),
-                    daemon=True
-                )
-                timer_thread.start()
-                
-                timer_info['thread'] = timer_thread
-                self.active_timers[timer_id] = timer_info
-                
-                # Announce timer start
-                self.tts.speak_text(f"Timer started for {minutes} minutes")
-                
-                return True
-                
+                self.active_timers[key] = timer_info
+                self._by_user.setdefault(user_id, set()).add(timer_id)
+                self._ensure_started()
+                self._schedule_timer(key, timer_info)
+            
+            self._notify('started', timer_info)
+            
+            # Announce timer start
+            self.tts.speak_text(f"Timer started for {minutes:g} minutes")
+            
+            return True
+        
         except Exception as e:
             print(f"Error starting timer: {e}")
             return False
     
-    def _timer_worker(self, timer_id: str, minutes: int):
+    def extend_timer(self, timer_id: str, minutes: float, user_id: Optional[int] = None) -> bool:
         """
-        Background worker for timer countdown
+        Add minutes to a running timer
         """
+        key = (user_id, timer_id)
+        with self._lock:
+            timer_info = self.active_timers.get(key)
+            if timer_info is None or not timer_info['is_active']:
+                return False
+            timer_info['end_time'] += timedelta(minutes=minutes)
+            timer_info['duration_minutes'] += minutes
+            self._schedule_timer(key, timer_info)
+        
+        self._notify('extended', timer_info)
+        return True
+    
+    def _remove(self, key):
+        timer_info = self.active_timers.pop(key)
+        timer_info['is_active'] = False
+        user_timers = self._by_user.get(key[0])
+        if user_timers is not None:
+            user_timers.discard(key[1])
+            if not user_timers:
+                del self._by_user[key[0]]
+        return timer_info
+    
+    def _scheduler(self):
+        """
+        Background worker that expires timers as they come due
+        """
+        while True:
+            with self._lock:
+                due = []
+                while not due:
+                    now = datetime.now()
+                    while self._schedule and self._schedule[0][0] <= now:
+                        end_time, _seq, key = heapq.heappop(self._schedule)
+                        timer_info = self.active_timers.get(key)
+                        # Entries left behind by an extended or cancelled timer are skipped
+                        if timer_info is not None and timer_info['end_time'] == end_time:
+                            due.append(self._remove(key))
+                    if not due:
+                        timeout = (self._schedule[0][0] - now).total_seconds() if self._schedule else None
+                        self._wakeup.wait(timeout)
+            
+            for timer_info in due:
+                self._expire(timer_info)
+    
+    def _expire(self, timer_info: Dict):
         try:
-            # Sleep for the specified duration
-            time.sleep(minutes * 60)
+            self._notify('expired', timer_info)
             
-            # Check if timer is still active
-            with self._lock:
-                if timer_id in self.active_timers and self.active_timers[timer_id]['is_active']:
-                    # Timer completed
-                    timer_info = self.active_timers[timer_id]
-                    timer_info['is_active'] = False
-                    
-                    # Announce completion
-                    self.tts.speak_text(f"Time's up! Your {minutes} minute timer has finished. Let's continue cooking!")
-                    
-                    # Call callback if provided
-                    if timer_info['callback']:
-                        try:
-                            timer_info['callback'](timer_id, minutes)
-                        except Exception as e:
-                            print(f"Error in timer callback: {e}")
-                    
-                    # Remove timer from active list
-                    del self.active_timers[timer_id]
-                    
+            # Announce completion
+            minutes = timer_info['duration_minutes']
+            self.tts.speak_text(f"Time's up! Your {minutes:g} minute timer has finished. Let's continue cooking!")
+            
+            # Call callback if provided
+            if timer_info['callback']:
+                try:
+                    timer_info['callback'](timer_info['id'], minutes)
+                except Exception as e:
+                    print(f"Error in timer callback: {e}")
+        
         except Exception as e:
             print(f"Error in timer worker: {e}")
     
-    def stop_timer(self, timer_id: str) -> bool:
+    def stop_timer(self, timer_id: str, user_id: Optional[int] = None) -> bool:
         """
         Stop an active timer
         """
         try:
             with self._lock:
-                if timer_id in self.active_timers:
-                    timer_info = self.active_timers[timer_id]
-                    timer_info['is_active'] = False
-                    
-                    # Announce timer stop
-                    self.tts.speak_text("Timer stopped")
-                    
-                    # Remove from active timers
-                    del self.active_timers[timer_id]
-                    return True
-                return False
-                
+                if (user_id, timer_id) in self.active_timers:
+                    # Remove from active timers; its schedule entry is skipped when it comes due
+                    timer_info = self._remove((user_id, timer_id))
+                else:
+                    return False
+            
+            self._notify('cancelled', timer_info)
+            
+            # Announce timer stop
+            self.tts.speak_text("Timer stopped")
+            return True
+        
         except Exception as e:
             print(f"Error stopping timer: {e}")
             return False
     
-    def get_timer_status(self, timer_id: str) -> Optional[Dict]:
+    def get_timer_status(self, timer_id: str, user_id: Optional[int] = None) -> Optional[Dict]:
         """
         Get status of a timer
         """
         with self._lock:
-            if timer_id in self.active_timers:
-                timer_info = self.active_timers[timer_id].copy()
+            if (user_id, timer_id) in self.active_timers:
+                timer_info = self.active_timers[(user_id, timer_id)].copy()
                 if timer_info['is_active']:
                     remaining = timer_info['end_time'] - datetime.now()
                     timer_info['remaining_seconds'] = max(0, int(remaining.total_seconds()))
@@ -117,18 +217,26 @@ class TimerManager:
                 return timer_info
             return None
     
-    def get_all_timers(self) -> Dict[str, Dict]:
+    def timers_for_user(self, user_id: int):
         """
-        Get all active timers
+        Public views of a user's running timers, soonest first
         """
         with self._lock:
-            return self.active_timers.copy()
+            timers = [self.active_timers[(user_id, timer_id)] for timer_id in self._by_user.get(user_id, ())]
+            return sorted((self.timer_payload(t) for t in timers), key=lambda t: t['ends_at'])
     
-    def get_remaining_time(self, timer_id: str) -> Optional[str]:
+    def get_all_timers(self, user_id: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Get all active timers of one user (default: the shared namespace), by timer id
+        """
+        with self._lock:
+            return {timer_id: self.active_timers[(user_id, timer_id)].copy() for timer_id in self._by_user.get(user_id, ())}
+    
+    def get_remaining_time(self, timer_id: str, user_id: Optional[int] = None) -> Optional[str]:
         """
         Get remaining time as a formatted string
         """
-        timer_info = self.get_timer_status(timer_id)
+        timer_info = self.get_timer_status(timer_id, user_id)
         if timer_info and timer_info['is_active']:
             remaining_seconds = timer_info['remaining_seconds']
             minutes = remaining_seconds // 60
@@ -136,11 +244,11 @@ class TimerManager:
             return f"{minutes:02d}:{seconds:02d}"
         return None
     
-    def announce_remaining_time(self, timer_id: str):
+    def announce_remaining_time(self, timer_id: str, user_id: Optional[int] = None):
         """
         Announce remaining time for a timer
         """
-        timer_info = self.get_timer_status(timer_id)
+        timer_info = self.get_timer_status(timer_id, user_id)
         if timer_info and timer_info['is_active']:
             remaining_minutes = timer_info['remaining_minutes']
             if remaining_minutes > 0:
@@ -154,20 +262,18 @@ class TimerManager:
         Clean up any expired timers
         """
         with self._lock:
-            expired_timers = []
-            for timer_id, timer_info in self.active_timers.items():
-                if datetime.now() > timer_info['end_time']:
-                    expired_timers.append(timer_id)
-            
-            for timer_id in expired_timers:
-                del self.active_timers[timer_id]
+            now = datetime.now()
+            for key in [k for k, t in self.active_timers.items() if now > t['end_time']]:
+                self._remove(key)
     
-    def get_timer_count(self) -> int:
+    def get_timer_count(self, user_id: Optional[int] = None) -> int:
         """
-        Get number of active timers
+        Get number of active timers, of one user if given
         """
         with self._lock:
-            return len(self.active_timers)
+            if user_id is None:
+                return len(self.active_timers)
+            return len(self._by_user.get(user_id, ()))
 
 # Global timer manager instance
-timer_manager = TimerManager() 
\ No newline at end of file
+timer_manager = TimerManager()